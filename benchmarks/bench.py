@@ -0,0 +1,211 @@
+""" Benchmark suite for the set calculator (standard library only).
+
+Run from the repository root:
+    python -m benchmarks.bench                        # print results as JSON
+    python -m benchmarks.bench --output out.json      # write results to a file
+    python -m benchmarks.bench --save-baseline base.json
+    python -m benchmarks.bench --baseline base.json   # exit code 1 on regressions
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterator, Optional
+
+from conjuntos.main import kind_to_symbols, reverse_symbols
+from conjuntos.model.evaluator import evaluate, power_set, cartesian_product
+from conjuntos.model.views import materialize
+from conjuntos.model.wrapper import FrozenSetWrapper, interning
+from conjuntos.parser.compiler import build_tree
+from conjuntos.parser.parser import SetParser
+from conjuntos.parser.tokenizer import SetTokenizer
+
+
+@dataclass
+class Result:
+    name: str
+    stage: str
+    size: int
+    seconds: float
+    peak_bytes: int
+
+
+@dataclass
+class Case:
+    """ One measurement: setup() runs untimed and its result is passed to run(). """
+    name: str
+    stage: str
+    size: int
+    setup: Callable[[], object]
+    run: Callable[[object], object]
+
+
+# Workloads
+def long_expression(n: int) -> str:
+    return " ∪ ".join(f"{{{i}, {i + 1}}}" for i in range(n))
+
+
+def nested_parentheses(depth: int) -> str:
+    return "(" * depth + "{1}" + " ∪ {2})" * depth
+
+
+def set_literal(n: int) -> str:
+    return "{" + ", ".join(str(i) for i in range(n)) + "}"
+
+
+def nested_sets(n: int) -> str:
+    return "{" + ", ".join("{" + str(i) + ", {" + str(i + 1) + "}}" for i in range(n)) + "}"
+
+
+def overlapping_power_sets(windows: int, width: int = 12) -> list:
+    """ Power sets of {k..k+width-1} for consecutive k; neighbouring power sets share half of their subsets. """
+    return [materialize(power_set([FrozenSetWrapper(range(k, k + width))])) for k in range(windows)]
+
+
+def interned(run: Callable[[object], object]) -> Callable[[object], object]:
+    """ run with set interning enabled; the table is dropped afterwards. """
+    def wrapped(arg: object) -> object:
+        interning.enable()
+        try:
+            return run(arg)
+        finally:
+            interning.disable()
+    return wrapped
+
+
+def multiway(op: str, n: int, ways: int = 6) -> tuple:
+    """ Plan of A0 op A1 op ... over overlapping sets of n elements, with the variables it reads; the last set is tiny. """
+    variables: dict = {f"A{i}": FrozenSetWrapper(range(i * n // 10, i * n // 10 + n)) for i in range(ways - 1)}
+    variables[f"A{ways - 1}"] = FrozenSetWrapper(range(5))
+    return _parser().compile(f" {op} ".join(variables)), variables
+
+
+def _parser() -> SetParser:
+    return SetParser(SetTokenizer(reverse_symbols(kind_to_symbols)), functions={"P": power_set}, cache_size=0)
+
+
+def expression_cases(name: str, text: str, size: int) -> Iterator[Case]:
+    """ Tokenize, parse and evaluate stages of one expression. """
+    parser: SetParser = _parser()
+    tokenizer: SetTokenizer = parser.tokenizer
+    yield Case(name, "tokenize", size, lambda: text, lambda t: tokenizer.tokenize(t))
+    yield Case(name, "parse", size, lambda: tokenizer.tokenize(text), lambda tokens: build_tree(tokens))
+    yield Case(name, "evaluate", size, lambda: parser.compile(text), lambda plan: plan.evaluate({}))
+
+
+def cases(full: bool) -> Iterator[Case]:
+    literal_sizes: list[int] = [10 ** 3, 10 ** 4, 10 ** 5] + ([10 ** 6] if full else [])
+    for n in (100, 1000):
+        yield from expression_cases("long_expression", long_expression(n), n)
+    for depth in (100, 500):
+        yield from expression_cases("nested_parentheses", nested_parentheses(depth), depth)
+    for n in literal_sizes:
+        yield from expression_cases("set_literal", set_literal(n), n)
+    for n in (100, 1000):
+        yield from expression_cases("nested_sets", nested_sets(n), n)
+
+    for n in ((10, 14, 16, 18) if full else (10, 14, 16)):
+        yield Case("power_set", "construct", n, lambda n=n: FrozenSetWrapper(range(n)),
+                   lambda s: materialize(power_set([s])))
+    for n in ((100, 300, 1000) if full else (100, 300)):
+        yield Case("cartesian_product", "construct", n * n, lambda n=n: FrozenSetWrapper(range(n)),
+                   lambda s: materialize(cartesian_product(s, s)))
+    for n in (10, 20):
+        yield Case("overlapping_power_sets", "plain", n, lambda n=n: n, overlapping_power_sets)
+        yield Case("overlapping_power_sets", "interned", n, lambda n=n: n, interned(overlapping_power_sets))
+        repeated: Callable[[object], object] = lambda plan: [plan.evaluate({}) for _ in range(10)]
+        yield Case("nested_sets", "repeat", n * 100, lambda n=n: _parser().compile(nested_sets(n * 100)), repeated)
+        yield Case("nested_sets", "repeat_interned", n * 100, lambda n=n: _parser().compile(nested_sets(n * 100)), interned(repeated))
+    for n in literal_sizes:
+        for name, op in (("multiway_intersection", "∩"), ("multiway_union", "∪")):
+            yield Case(name, "evaluate", n, lambda n=n, op=op: multiway(op, n), lambda pv: pv[0].evaluate(pv[1]))
+    for n in literal_sizes:
+        yield Case("union", "evaluate", n, lambda n=n: (FrozenSetWrapper(range(n)), FrozenSetWrapper(range(n // 2, n + n // 2))),
+                   lambda ab: evaluate("UNION", *ab))
+
+
+def measure(case: Case, repeat: int) -> Result:
+    """ Best wall time over repeat runs, then peak traced memory of one more run. """
+    best: float = float("inf")
+    for _ in range(repeat):
+        arg = case.setup()
+        gc.collect()
+        start: float = time.perf_counter()
+        case.run(arg)
+        best = min(best, time.perf_counter() - start)
+
+    arg = case.setup()
+    gc.collect()
+    tracemalloc.start()
+    case.run(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return Result(case.name, case.stage, case.size, best, peak)
+
+
+def key(r: dict) -> str:
+    return f"{r['name']}/{r['stage']}/{r['size']}"
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """ Describes every result slower (or larger) than its baseline by more than tolerance. """
+    previous: dict[str, dict] = {key(r): r for r in baseline}
+    regressions: list[str] = []
+    for r in results:
+        old: Optional[dict] = previous.get(key(r))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if old[metric] > 0 and r[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{key(r)} {metric}: {old[metric]:.6g} -> {r[metric]:.6g} (+{r[metric] / old[metric] - 1:.0%})")
+    return regressions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Set calculator benchmarks")
+    arg_parser.add_argument("--full", action="store_true", help="include the largest workloads (10^6 elements)")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best one is kept")
+    arg_parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    arg_parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    arg_parser.add_argument("--save-baseline", metavar="FILE", help="also store the results as a baseline")
+    arg_parser.add_argument("--baseline", metavar="FILE", help="compare against a stored baseline")
+    arg_parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = arg_parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    results: list[dict] = []
+    for case in cases(args.full):
+        if args.filter in case.name:
+            result: Result = measure(case, args.repeat)
+            results.append(asdict(result))
+            print(f"{key(results[-1]):40} {result.seconds * 1000:10.3f} ms {result.peak_bytes / 1024:12.1f} KiB", file=sys.stderr)
+
+    report: dict = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+    text: str = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding="utf-8") as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline: list[dict] = json.load(f)["results"]
+        regressions: list[str] = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("[REGRESSION]", line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
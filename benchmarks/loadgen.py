@@ -0,0 +1,97 @@
+""" Load generator for the set calculator server (standard library only).
+
+Start a server, then run from the repository root:
+    python -m conjuntos.server --port 7878
+    python -m benchmarks.loadgen --port 7878 --clients 50 --requests 200
+    python -m benchmarks.loadgen --unix /tmp/conjuntos.sock --heavy 0.05   # 5% of requests are power sets
+Each client opens one connection, defines its own variables and sends requests one after another.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Optional
+
+
+def workload(client: int, requests: int, heavy: float, seed: int) -> list[str]:
+    """ A client's requests: definitions first, then a random mix of cheap operations and heavy power sets. """
+    rng: random.Random = random.Random(seed + client)
+    lines: list[str] = [
+        "A = {" + ", ".join(str(rng.randrange(100)) for _ in range(20)) + "}",
+        "B = {" + ", ".join(str(rng.randrange(100)) for _ in range(20)) + "}",
+    ]
+    cheap: list[str] = ["A ∪ B", "A ∩ B", "A - B", "A ⊖ B", "A ⊂ S", "(A ∪ B) ∩ S", "A X {1, 2}", "{1..1000} - A"]
+    for _ in range(requests):
+        lines.append("P({1..16})" if rng.random() < heavy else rng.choice(cheap))
+    return lines
+
+
+async def client(lines: list[str], open_connection, latencies: list[float], errors: list[str]) -> None:
+    reader, writer = await open_connection()
+    try:
+        for line in lines:
+            start: float = time.perf_counter()
+            writer.write(line.encode("utf-8") + b"\n")
+            await writer.drain()
+            response: bytes = await reader.readline()
+            latencies.append(time.perf_counter() - start)
+            if not response.startswith(b"OK"):
+                errors.append(response.decode("utf-8", errors="replace").strip() or "connection closed")
+        writer.write(b"exit\n")
+        await writer.drain()
+        await reader.readline()
+    finally:
+        writer.close()
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered: list[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    limit: int = 1 << 26  # Power set responses are long lines
+
+    def open_connection():
+        if args.unix:
+            return asyncio.open_unix_connection(args.unix, limit=limit)
+        return asyncio.open_connection(args.host, args.port, limit=limit)
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    start: float = time.perf_counter()
+    await asyncio.gather(*(client(workload(i, args.requests, args.heavy, args.seed), open_connection, latencies, errors)
+                           for i in range(args.clients)))
+    elapsed: float = time.perf_counter() - start
+    return {
+        "clients": args.clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+        "first_errors": sorted(set(errors))[:5],
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    arg_parser = argparse.ArgumentParser(description="Set Calculator server load generator")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=7878)
+    arg_parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket instead of TCP")
+    arg_parser.add_argument("--clients", type=int, default=20, help="concurrent connections")
+    arg_parser.add_argument("--requests", type=int, default=100, help="requests per client, after its definitions")
+    arg_parser.add_argument("--heavy", type=float, default=0.0, help="fraction of requests that are power sets")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+""" Serial against process-pool materialization of products and power sets (standard library only).
+
+Run from the repository root:
+    python -m benchmarks.parallel --workers 4
+Each workload is built once serially and once through the pool, whatever the thresholds, and the calibrated
+thresholds of the backend are printed with the timings, as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Callable, Optional
+
+from conjuntos.model.parallel import parallel
+from conjuntos.model.views import CartesianProductView, PowerSetView
+from conjuntos.model.wrapper import FrozenSetWrapper
+
+
+def workloads(scale: int) -> dict[str, Callable[[], object]]:
+    side: FrozenSetWrapper = FrozenSetWrapper(range(scale))
+    return {
+        f"product {scale}x{scale}": lambda: CartesianProductView(side, side),
+        f"power set of {scale.bit_length() + 6}": lambda: PowerSetView(FrozenSetWrapper(range(scale.bit_length() + 6))),
+    }
+
+
+def timed(build: Callable[[], object]) -> float:
+    start: float = time.perf_counter()
+    build()
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    arg_parser = argparse.ArgumentParser(description="Parallel backend benchmark")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--scale", type=int, default=1000, help="side of the product; the power set follows it")
+    args = arg_parser.parse_args(argv)
+
+    results: dict[str, dict[str, float]] = {}
+    for name, view in workloads(args.scale).items():
+        parallel.disable()
+        serial: float = timed(lambda: view().materialize())
+        parallel.enable(args.workers)
+        thresholds, calibrated = dict(parallel.thresholds), parallel.calibrated
+        parallel.thresholds, parallel.calibrated = {"product": 0, "power_set": 0}, True  # Always take the pool
+        try:
+            pooled: float = timed(lambda: view().materialize())
+        finally:
+            parallel.thresholds, parallel.calibrated = thresholds, calibrated
+        results[name] = {"serial_s": round(serial, 3), "pool_s": round(pooled, 3), "speedup": round(serial / pooled, 2)}
+
+    parallel.calibrate()
+    parallel.disable()
+    print(json.dumps({"workers": args.workers, "cpus": os.cpu_count(), "results": results,
+                      "thresholds": parallel.thresholds, "measurements": parallel.measurements}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,25 @@
+import argparse
+import io
 import sys
 import time
 
-from typing import Iterable, TypeVar
+from typing import Iterable, Mapping, TextIO, TypeVar
 
+from conjuntos.model.bitset import as_universe
+from conjuntos.model.budget import budget
 from conjuntos.model.evaluator import power_set, set_element_t
-from conjuntos.model.wrapper import SetWrapper
+from conjuntos.model.instrumentation import instrumentation
+from conjuntos.model.parallel import parallel
+from conjuntos.model.render import render
+from conjuntos.model.snapshot import save, load
+from conjuntos.model.wrapper import SetWrapper, FrozenSetWrapper, interning
 
 from conjuntos.parser.exceptions import ParseError, EvaluateError
+from conjuntos.parser.functions import FunctionRegistry
 from conjuntos.parser.parser import Parser, SetParser, ParseResult
 from conjuntos.parser.resolve import ParseHandler
 from conjuntos.parser.tokenizer import Tokenizer, SetTokenizer
+from conjuntos.parser.workspace import Workspace
 
 
 # Type Aliases
@@ -17,6 +27,27 @@ _T = TypeVar("_T")
 _U = TypeVar("_U")
 
 
+kind_to_symbols: dict[str, list[str]] = {
+    "SET_OPEN": ["{"], "SET_CLOSE": ["}"],
+    "OPEN": ["("], "CLOSE": [")"],
+    "SEP": [","],
+    "RANGE": [".."],
+    "CARDINALITY": ["|"],
+    "DEFINE": ["="],
+    "UNION": ["⋃", "∪", "UNION"],
+    "INTERSECT": ["⋂", "∩", "^", "INTERSECT", "INTERSECTION"],
+    "DIFFERENCE": ["-", "DIFFERENCE"],
+    "BELONG": ["∈", "e"],
+    "NOT_BELONG": ["∉"],
+    "IMPROPER_SUBSET": ["⊆"],
+    "PROPER_SUBSET": ["⊂"],
+    "NOT_SUBSET": ["⊄"],
+    "SYMMETRIC_DIFFERENCE": ["⊖", "⊕", "^", "SYMMETRIC_DIFFERENCE"],
+    "CARTESIAN": ["X"],
+    "COMPLEMENT": ["'"]
+}
+
+
 def reverse_symbols(mapped: dict[_T, Iterable[_U]]) -> dict[_U, _T]:
     """ Makes a list of values point to a key. """
     reversed_mapped: dict[str, str] = dict()
@@ -26,6 +57,11 @@ def reverse_symbols(mapped: dict[_T, Iterable[_U]]) -> dict[_U, _T]:
     return reversed_mapped
 
 
+def base_variables() -> dict[str, set_element_t]:
+    """ Variables every session starts with: the empty set, PI and the universal set S. """
+    return {"∅": FrozenSetWrapper(), "PI": 3.1415, "π": 3.1415, "S": as_universe(SetWrapper(range(10)))}
+
+
 def write_print(text: str, delay: float = 0.1, end='\n', end_delay: float = 1) -> None:
     for c in text:
         sys.stdout.write(c)
@@ -45,48 +81,144 @@ def simulate(handler: ParseHandler[_T], exprs: Iterable[str]) -> None:
     print("Simulation finished.")
 
 
+def describe(error: Exception) -> str:
+    """ Message of an error raised by a statement; unexpected errors also name their type. """
+    if isinstance(error, (ParseError, EvaluateError)):
+        return str(error)
+    return f"{type(error).__name__}: {error}"
+
+
+def run_batch(handler: ParseHandler[_T], lines: Iterable[str], out: TextIO) -> tuple[int, int]:
+    """ Resolves each line in order without prompts or delays; errors are reported with their line number
+    and the run goes on with the next line. Lines are consumed one at a time, so the input never has to fit in memory.
+    Returns (statements, errors). """
+    statements: int = 0
+    errors: int = 0
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        statements += 1
+        try:
+            result: ParseResult[_T] = handler.resolve(line)
+        except Exception as e:
+            errors += 1
+            print(f"[ERROR] line {number}:", describe(e), file=out)
+            continue
+        if result.kind == "EXIT":
+            break
+    return statements, errors
+
+
+def memory_size(text: str) -> int:
+    """ Bytes from a size such as 512K, 64M or 2G (powers of 1024). """
+    units: dict[str, int] = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    text = text.strip().upper().removesuffix("B").removesuffix("I")
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}") from None
+
+
+def format_stats(snapshot: dict[str, dict[str, dict[str, float]]]) -> str:
+    """ Table of the instrumentation counters, one line per phase, operator and function. """
+    lines: list[str] = []
+    for section, timings in snapshot.items():
+        if not timings:
+            continue
+        lines.append(f"[{section}]")
+        for name, t in sorted(timings.items(), key=lambda item: -item[1]["total"]):
+            line: str = f"  {name:24} calls={t['calls']:<8} total={t['total'] * 1000:.3f}ms max={t['max'] * 1000:.3f}ms"
+            if t["input_size"] or t["output_size"]:
+                line += f" in={t['input_size']} out={t['output_size']}"
+            lines.append(line)
+    return "\n".join(lines) if lines else "No statistics recorded."
+
+
+def format_rewrites(rewrites: Mapping[str, int]) -> str:
+    """ Identities applied by the optimizer (-O), with how many compiled expressions each one simplified. """
+    if not rewrites:
+        return "[optimizer]\n  No rewrites applied."
+    return "[optimizer]\n" + "\n".join(f"  {name:24} applied={count}"
+                                         for name, count in sorted(rewrites.items(), key=lambda item: -item[1]))
+
+
 def main() -> None:
-    kind_to_symbols: dict[str, list[str]] = {
-        "SET_OPEN": ["{"], "SET_CLOSE": ["}"],
-        "OPEN": ["("], "CLOSE": [")"],
-        "SEP": [","],
-        "DEFINE": ["="],
-        "UNION": ["⋃", "∪", "UNION"],
-        "INTERSECT": ["⋂", "∩", "^", "INTERSECT", "INTERSECTION"],
-        "DIFFERENCE": ["-", "DIFFERENCE"],
-        "BELONG": ["∈", "e"],
-        "NOT_BELONG": ["∉"],
-        "IMPROPER_SUBSET": ["⊆"],
-        "PROPER_SUBSET": ["⊂"],
-        "NOT_SUBSET": ["⊄"],
-        "SYMMETRIC_DIFFERENCE": ["⊖", "⊕", "^", "SYMMETRIC_DIFFERENCE"],
-        "CARTESIAN": ["X"],
-        "COMPLEMENT": ["'"]
-    }
+    arg_parser = argparse.ArgumentParser(description="Set Calculator")
+    arg_parser.add_argument("-b", "--batch", metavar="FILE", nargs='?', const='-',
+                            help="run the statements of FILE (or stdin if omitted) without prompts")
+    arg_parser.add_argument("-r", "--reactive", action="store_true",
+                            help="recompute definitions automatically when the variables they use change")
+    arg_parser.add_argument("-O", "--optimize", action="store_true",
+                            help="simplify expressions with set-algebra identities before evaluating them "
+                                 "('stats' lists the identities applied)")
+    arg_parser.add_argument("-p", "--profile", action="store_true",
+                            help="record per-operator and per-phase statistics (see the 'stats' command)")
+    arg_parser.add_argument("-j", "--parallel", metavar="WORKERS", nargs='?', type=int, const=0,
+                            help="build large products and power sets in a process pool, from the size where it is measured "
+                                 "to pay off (WORKERS defaults to the number of CPUs)")
+    arg_parser.add_argument("-i", "--intern", action="store_true",
+                            help="share equal immutable sets in memory (less memory for repeated subsets, slower set building)")
+    arg_parser.add_argument("-l", "--load", metavar="SNAPSHOT", help="start from the variables saved in SNAPSHOT")
+    arg_parser.add_argument("--lazy", action="store_true", help="with --load, decode each variable only on first use")
+    arg_parser.add_argument("--max-elements", metavar="N", type=int,
+                            help="refuse to build any set with more than N elements")
+    arg_parser.add_argument("--max-memory", metavar="SIZE", type=memory_size,
+                            help="refuse to build any set estimated to take more than SIZE (e.g. 512M, 2G)")
+    arg_parser.add_argument("--time-limit", metavar="SECONDS", type=float,
+                            help="abort a statement that runs for longer than SECONDS")
+    arg_parser.add_argument("--max-print", metavar="N", type=int,
+                            help="print only the first N elements of a result")
+    args = arg_parser.parse_args()
+    if args.profile:
+        instrumentation.enable()
+    if args.parallel is not None:
+        parallel.enable(args.parallel or None)
+    if args.intern:
+        interning.enable()
+    budget.configure(args.max_elements, args.max_memory, args.time_limit)
+
     symbol_to_kind: dict[str, str] = reverse_symbols(kind_to_symbols)
     set_tokenizer: Tokenizer = SetTokenizer(symbol_to_kind)
 
     parser: SetParser[set_element_t] = SetParser(
         tokenizer=set_tokenizer,
-        variables={
-            "∅": SetWrapper(), "PI": 3.1415, "π": 3.1415, "S": SetWrapper(range(10))
-        },
-        functions={"P": power_set}
+        variables=base_variables(),
+        functions=FunctionRegistry({"P": power_set}, pure=("P",)),
+        reactive=args.reactive,
+        optimize=args.optimize
     )
+    if args.load:
+        try:
+            parser.variables = load(args.load, lazy=args.lazy)
+        except (OSError, EvaluateError) as e:
+            arg_parser.error(str(e))
+        if args.reactive:
+            parser.variables = Workspace(parser.variables)
+
+    out: TextIO = sys.stdout
+    if args.batch is not None:
+        # Block-buffered output; flushed in large chunks instead of per line
+        out = io.TextIOWrapper(io.BufferedWriter(io.FileIO(sys.stdout.fileno(), 'w', closefd=False), buffer_size=1 << 16),
+                               encoding="utf-8")
 
     handler: ParseHandler[set_element_t] = ParseHandler(
         parser=parser,
-        default_handler=lambda x: print("Unexpected Result.")
+        default_handler=lambda x: print("Unexpected Result.", file=out)
     )
 
-    print(" [Set Calculator] ".center(40, '-'))
-    print("Operations: " + ", ".join("∪ ∩ - ⊕ X ' ⊂ ⊆ ∈".split()))
-    print("You can define variables. \nExample: \n> A = {1, 2}")
-    print("You can do operations. \nExample: \n> 1 ∈ {1, 2}")
-    print("Get the powerset of a set by calling P(A) or P({...})")
-    print("Enter 'clean' to clean variables.")
-    print("You can also enter 'exit' to close program.")
-    print("".center(40, '-'))
+    if args.batch is None:
+        print(" [Set Calculator] ".center(40, '-'))
+        print("Operations: " + ", ".join("∪ ∩ - ⊕ X ' ⊂ ⊆ ∈".split()))
+        print("You can define variables. \nExample: \n> A = {1, 2}")
+        print("You can do operations. \nExample: \n> 1 ∈ {1, 2}")
+        print("Get the powerset of a set by calling P(A) or P({...})")
+        print("Enter 'clean' to clean variables.")
+        print("Enter 'save FILE' and 'load FILE' to keep variables between sessions.")
+        print("Enter 'stats on' and 'stats' to see where time is spent.")
+        print("You can also enter 'exit' to close program.")
+        print("".center(40, '-'))
 
     is_running: bool = True
 
@@ -98,16 +230,63 @@ def main() -> None:
     def _h_exit(r: ParseResult[set_element_t]) -> None:
         nonlocal is_running
         is_running = False
-        print(f"Successful exit with code={r.value}.")
+        print(f"Successful exit with code={r.value}.", file=out)
 
     @handler.add("VALUE")
     def _h_value(r: ParseResult[set_element_t]) -> None:
-        print(r.value)
+        render(r.value, out, args.max_print)
 
     @handler.add("CLEAN")
     def _h_clean(r: ParseResult[set_element_t]) -> None:
-        parser.variables = {"∅": SetWrapper(), "PI": 3.1415, "π": 3.1415}
-        print("Variables cleaned.")
+        parser.variables = {"∅": FrozenSetWrapper(), "PI": 3.1415, "π": 3.1415}
+        if args.reactive:
+            parser.variables = Workspace(parser.variables)
+        parser.functions.invalidate()
+        print("Variables cleaned.", file=out)
+
+    @handler.add("SAVE")
+    def _h_save(r: ParseResult[set_element_t]) -> None:
+        try:
+            records: int = save(parser.variables, r.value)
+        except OSError as e:
+            print("[ERROR]", e, file=out)
+            return
+        print(f"Saved {len(parser.variables)} variables ({records} distinct values) to '{r.value}'.", file=out)
+
+    @handler.add("LOAD")
+    def _h_load(r: ParseResult[set_element_t]) -> None:
+        path, lazy = r.value
+        try:
+            variables = load(path, lazy=lazy)
+        except (OSError, EvaluateError) as e:
+            print("[ERROR]", e, file=out)
+            return
+        parser.variables = Workspace(variables) if args.reactive else variables
+        print(f"Loaded {len(variables)} variables from '{path}'.", file=out)
+
+    @handler.add("STATS")
+    def _h_stats(r: ParseResult[set_element_t]) -> None:
+        if r.value == "on":
+            instrumentation.enable()
+            print("Statistics enabled.", file=out)
+        elif r.value == "off":
+            instrumentation.disable()
+            print("Statistics disabled.", file=out)
+        elif r.value == "reset":
+            instrumentation.reset()
+            print("Statistics cleared.", file=out)
+        else:
+            if not instrumentation.enabled:
+                print("Statistics are disabled; enter 'stats on' or run with --profile.", file=out)
+            print(format_stats(instrumentation.snapshot()), file=out)
+            cache: dict[str, int] = parser.functions.info()
+            print(f"[function cache]\n  hits={cache['hits']} misses={cache['misses']} evictions={cache['evictions']} "
+                  f"entries={cache['size']} elements={cache['weight']}/{cache['max_size']}", file=out)
+            if parser.optimize:
+                print(format_rewrites(parser.rewrites), file=out)
+            if interning.enabled:
+                shared: dict[str, int] = interning.info()
+                print(f"[interning]\n  hits={shared['hits']} misses={shared['misses']} alive={shared['size']}", file=out)
 
     exprs: list[str] = [
         "S = {0, 1, 2, 3, 4, 5, 6, 7, 8, 9}",
@@ -120,12 +299,23 @@ def main() -> None:
     ]
     # simulate(handler, exprs)
 
+    if args.batch is not None:
+        start: float = time.perf_counter()
+        with (sys.stdin if args.batch == '-' else open(args.batch, encoding="utf-8")) as lines:
+            statements, errors = run_batch(handler, lines, out)
+        out.flush()
+        elapsed: float = time.perf_counter() - start
+        rate: float = statements / elapsed if elapsed > 0 else 0.0
+        print(f"{statements} statements ({errors} errors) in {elapsed:.3f}s; {rate:.1f} statements/s.", file=sys.stderr)
+        parallel.disable()
+        return
+
     while is_running:
         expr: str = input("> ")
         try:
             handler.resolve(expr)
-        except (ParseError, EvaluateError) as e:
-            print("[ERROR]", str(e))
+        except Exception as e:
+            print("[ERROR]", describe(e))
 
 
 if __name__ == "__main__":
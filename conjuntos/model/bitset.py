@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, Optional
+
+from conjuntos.model.numeric import NumericSet
+from conjuntos.model.views import SetView
+from conjuntos.model.wrapper import _SET_TYPES
+
+try:
+    _popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def _popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+class Universe:
+    """ Fixed indexing of the universal set S; element i is bit i of every BitSet drawn from it. """
+    def __init__(self, elements: Iterable[Any]):
+        self.elements: list[Any] = []
+        self.index: dict[Any, int] = {}
+        for e in elements:
+            if e not in self.index:
+                self.index[e] = len(self.elements)
+                self.elements.append(e)
+        self.full: int = (1 << len(self.elements)) - 1
+
+    def encode(self, s: Iterable[Any]) -> Optional[BitSet]:
+        """ Returns s as a BitSet of this universe, or None if s has elements outside it. """
+        if isinstance(s, BitSet) and s.universe is self:
+            return s
+        index: dict[Any, int] = self.index
+        mask: int = 0
+        for e in s:
+            i: Optional[int] = index.get(e)
+            if i is None:
+                return None
+            mask |= 1 << i
+        return BitSet(self, mask)
+
+    def full_set(self) -> BitSet:
+        return BitSet(self, self.full)
+
+
+class BitSet(SetView):
+    """ Set encoded as an arbitrary-precision bitmask over a Universe. """
+    def __init__(self, universe: Universe, mask: int = 0):
+        self.universe: Universe = universe
+        self.mask: int = mask
+
+    def cardinality(self) -> int:
+        return _popcount(self.mask)
+
+    def __contains__(self, item: Any) -> bool:
+        try:
+            i: Optional[int] = self.universe.index.get(item)
+        except TypeError:  # Unhashable
+            return False
+        return i is not None and (self.mask >> i) & 1 == 1
+
+    def __iter__(self) -> Iterator[Any]:
+        elements: list[Any] = self.universe.elements
+        mask: int = self.mask
+        while mask:
+            low: int = mask & -mask
+            yield elements[low.bit_length() - 1]
+            mask ^= low
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BitSet) and other.universe is self.universe:
+            return self.mask == other.mask
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return super().__hash__()
+
+    def __str__(self) -> str:
+        if self.mask:
+            return '{' + ", ".join(str(i) for i in self) + '}'
+        return "∅"
+
+
+def as_universe(s: Any) -> Any:
+    """ Encodes a concrete set as the full BitSet of a new Universe; other values are returned unchanged. """
+    if isinstance(s, BitSet) and s.mask == s.universe.full:
+        return s
+    if isinstance(s, (*_SET_TYPES, BitSet, NumericSet)):
+        return Universe(s).full_set()
+    return s
+
+
+def encode_relative(s: Any, universal: Any) -> Any:
+    """ Encodes a concrete set over the universe of S when every element belongs to it. """
+    if isinstance(universal, BitSet) and isinstance(s, _SET_TYPES):
+        encoded: Optional[BitSet] = universal.universe.encode(s)
+        if encoded is not None:
+            return encoded
+    return s
+
+
+def _common_universe(left: Any, right: Any) -> Optional[tuple[BitSet, BitSet]]:
+    """ Both operands as BitSets of the same universe, or None if one does not fit. """
+    if isinstance(left, BitSet):
+        universe: Universe = left.universe
+    elif isinstance(right, BitSet):
+        universe = right.universe
+    else:
+        return None
+    if not isinstance(left, (*_SET_TYPES, BitSet)) or not isinstance(right, (*_SET_TYPES, BitSet)):
+        return None
+    l: Optional[BitSet] = universe.encode(left)
+    if l is None:
+        return None
+    r: Optional[BitSet] = universe.encode(right)
+    if r is None:
+        return None
+    return l, r
+
+
+_bitset_evaluations = {
+    "UNION": lambda l, r: l | r,
+    "INTERSECT": lambda l, r: l & r,
+    "DIFFERENCE": lambda l, r: l & ~r,
+    "SYMMETRIC_DIFFERENCE": lambda l, r: l ^ r,
+}
+
+
+def bitset_evaluate(op: str, left: Any, right: Any) -> Optional[BitSet]:
+    """ Runs a set operation as a single big-int operation; None when the operands do not share a universe. """
+    if op not in _bitset_evaluations:
+        return None
+    operands: Optional[tuple[BitSet, BitSet]] = _common_universe(left, right)
+    if operands is None:
+        return None
+    l, r = operands
+    return BitSet(l.universe, _bitset_evaluations[op](l.mask, r.mask))
+
+
+def bitset_is_subset(left: Any, right: Any) -> Optional[bool]:
+    """ left ⊆ right as a mask test; None when the operands do not share a universe. """
+    operands: Optional[tuple[BitSet, BitSet]] = _common_universe(left, right)
+    if operands is None:
+        return None
+    l, r = operands
+    return l.mask & ~r.mask == 0
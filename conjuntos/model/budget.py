@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+from time import perf_counter
+from typing import Any, Iterable, Iterator, Optional
+
+from conjuntos.model.wrapper import _SET_TYPES, _scientific
+from conjuntos.parser.exceptions import EvaluateError
+
+# Approximate CPython costs, in bytes, used to estimate a set before building it
+SLOT_BYTES: int = 32     # Hash table entry of a set, spare capacity included
+SET_BYTES: int = 216     # Empty frozenset
+NUMBER_BYTES: int = 80   # Number and the int or float it wraps
+PAIR_BYTES: int = 64     # 2-tuple
+
+# Items produced between two checks of the time budget
+_PACE: int = 4096
+
+
+def format_count(n: int) -> str:
+    return str(n) if n.bit_length() < 50 else _scientific(n)
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if n < 1024 or unit == "TiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TiB"
+
+
+def operation_estimate(op: str, operands: list[Any]) -> Optional[tuple[int, int]]:
+    """ Upper bound of the cardinality and the bytes of a set operation across hash sets.
+    None for other operands: views stay lazy and are estimated when they are built. """
+    if not all(isinstance(o, _SET_TYPES) for o in operands):
+        return None
+    if op in ("UNION", "SYMMETRIC_DIFFERENCE"):
+        n: int = sum(len(o) for o in operands)
+    elif op == "INTERSECT":
+        n = min(len(o) for o in operands)
+    elif op == "DIFFERENCE":
+        n = len(operands[0])
+    else:
+        return None
+    return n, SET_BYTES + n * SLOT_BYTES  # The elements themselves already exist
+
+
+class Budget:
+    """ Opt-in limits on the sets an evaluation may build: elements, estimated bytes and seconds per statement.
+    Sets are checked against their estimate before being allocated; going over raises EvaluateError. """
+    def __init__(self):
+        self.enabled: bool = False
+        self.max_elements: Optional[int] = None
+        self.max_bytes: Optional[int] = None
+        self.max_seconds: Optional[float] = None
+        self._local: threading.local = threading.local()  # Deadline of the statement running in each thread
+
+    def configure(self, max_elements: Optional[int] = None, max_bytes: Optional[int] = None,
+                  max_seconds: Optional[float] = None) -> None:
+        self.max_elements = max_elements
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.enabled = any(limit is not None for limit in (max_elements, max_bytes, max_seconds))
+
+    def start(self) -> None:
+        """ Starts the time budget of a new statement. """
+        self._local.deadline = None if self.max_seconds is None else perf_counter() + self.max_seconds
+
+    def admit(self, what: str, cardinality: int, nbytes: int) -> None:
+        """ Raises EvaluateError if building what (cardinality elements, about nbytes) would go over the budget. """
+        if self.max_elements is not None and cardinality > self.max_elements:
+            raise EvaluateError(f"{what} would have {format_count(cardinality)} elements; "
+                                f"the budget is {format_count(self.max_elements)}.")
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            raise EvaluateError(f"{what} would take about {format_bytes(nbytes)}; the budget is {format_bytes(self.max_bytes)}.")
+        self.check_time()
+
+    def admit_operation(self, op: str, operands: list[Any]) -> None:
+        estimate: Optional[tuple[int, int]] = operation_estimate(op, operands)
+        if estimate is not None:
+            self.admit(f"The result of {op}", *estimate)
+
+    def check_time(self) -> None:
+        deadline: Optional[float] = getattr(self._local, "deadline", None)
+        if deadline is not None and perf_counter() > deadline:
+            raise EvaluateError(f"Evaluation went over the time budget of {self.max_seconds}s.")
+
+    def paced(self, items: Iterable[Any]) -> Iterator[Any]:
+        """ items, checking the time budget every few thousand of them. """
+        if self.max_seconds is None:
+            yield from items
+            return
+        for i, item in enumerate(items):
+            if i % _PACE == 0:
+                self.check_time()
+            yield item
+
+
+# Shared by the views, the evaluator and the parser; no limits until configure() sets one
+budget: Budget = Budget()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any
+
+from conjuntos.model.bitset import BitSet, _popcount
+from conjuntos.model.intervals import IntervalSet, interval_evaluate
+from conjuntos.model.numeric import NumericSet, numeric_evaluate
+from conjuntos.model.views import CartesianProductView, PowerSetView, size
+
+
+def intersection_size(left: Any, right: Any) -> int:
+    """ |left ∩ right| without building the intersection.
+    Closed forms for power sets (2^|A ∩ B|), products (|A ∩ C| * |B ∩ D|), intervals and bitmasks;
+    otherwise the elements of the smaller set are looked up in the larger one. """
+    if isinstance(left, PowerSetView) and isinstance(right, PowerSetView):
+        return 2 ** intersection_size(left.base, right.base)
+    if isinstance(left, CartesianProductView) and isinstance(right, CartesianProductView):
+        return intersection_size(left.left, right.left) * intersection_size(left.right, right.right)
+    if isinstance(left, IntervalSet) and isinstance(right, IntervalSet):
+        return interval_evaluate("INTERSECT", left, right).cardinality()
+    if isinstance(left, BitSet) and isinstance(right, BitSet) and left.universe is right.universe:
+        return _popcount(left.mask & right.mask)
+    if isinstance(left, NumericSet) and isinstance(right, NumericSet):
+        return numeric_evaluate("INTERSECT", left, right).cardinality()
+
+    smaller, larger = (left, right) if size(left) <= size(right) else (right, left)
+    return sum(1 for e in smaller if e in larger)
+
+
+def operation_size(op: str, left: Any, right: Any) -> int:
+    """ Cardinality of a set operation between two sets, by inclusion–exclusion over |left ∩ right|. """
+    common: int = intersection_size(left, right)
+    if op == "INTERSECT":
+        return common
+    if op == "UNION":
+        return size(left) + size(right) - common
+    if op == "DIFFERENCE":
+        return size(left) - common
+    if op == "SYMMETRIC_DIFFERENCE":
+        return size(left) + size(right) - 2 * common
+    raise ValueError(f"No cardinality formula for: {op}")
@@ -1,75 +1,102 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from itertools import combinations
+from functools import partial
 from typing import Union, Callable
 
 from conjuntos.parser.exceptions import EvaluateError
-from conjuntos.model.wrapper import SetWrapper, Number
+from conjuntos.model.wrapper import SetWrapper, FrozenSetWrapper, Number, _SET_TYPES
+from conjuntos.model.views import SetView, PowerSetView, CartesianProductView, size, materialize
+from conjuntos.model.bitset import bitset_evaluate, bitset_is_subset
+from conjuntos.model.intervals import interval_evaluate, interval_is_subset
+from conjuntos.model.numeric import numeric_evaluate, numeric_is_subset
+from conjuntos.model.budget import budget
+from conjuntos.model.instrumentation import instrumentation
 
 # Type Aliases
-set_element_t = Union[Number, bool, str, SetWrapper["set_element_t"], tuple["set_element_t", "set_element_t"]]
-set_t = Union[SetWrapper[set_element_t]]
+set_element_t = Union[Number, bool, str, SetWrapper["set_element_t"], FrozenSetWrapper["set_element_t"], SetView, tuple["set_element_t", "set_element_t"]]
+set_t = Union[SetWrapper[set_element_t], FrozenSetWrapper[set_element_t], SetView]
 set_function = Callable[[list[set_element_t]], set_element_t]
+_handler_t = Callable[[set_element_t, set_element_t], set_element_t]
 
 # Operators
 _UNARY_OPERATORS: set[str] = {"COMPLEMENT"}
 _SET_OPERATORS: set[str] = {"UNION", "INTERSECT", "DIFFERENCE", "SYMMETRIC_DIFFERENCE", "CARTESIAN"}.union(_UNARY_OPERATORS)
 _BOOL_OPERATORS: set[str] = {"BELONG", "NOT_BELONG", "PROPER_SUBSET", "IMPROPER_SUBSET", "NOT_SUBSET"}
-_OPERATORS: set[str] = {"END", "DEFINE"}.union(_SET_OPERATORS.union(_BOOL_OPERATORS))
+_OPERATORS: set[str] = {"END", "DEFINE", "RANGE"}.union(_SET_OPERATORS.union(_BOOL_OPERATORS))
+
+_RIGHT_ASSOCIATIVE: set[str] = {"DEFINE"}
+# Associative and commutative between sets; chains of them are evaluated as one n-ary operation
+CHAINABLE: frozenset[str] = frozenset(("UNION", "INTERSECT", "SYMMETRIC_DIFFERENCE"))
 
 _priorities: defaultdict[str, int] = defaultdict(lambda: 0)
-_priorities.update(dict(END=-1, VAR=1, NUMBER=1, COMPLEMENT=2))
+_priorities.update(dict(END=-3, DEFINE=-2, RANGE=-1, VAR=1, NUMBER=1, COMPLEMENT=2))
+_priorities.update({op: -1 for op in _BOOL_OPERATORS})
+
+
+# Integer opcodes of the operator kinds; assigned to tokens by the tokenizer
+_KINDS: tuple[str, ...] = tuple(sorted(_OPERATORS))
+OPCODES: dict[str, int] = {kind: code for code, kind in enumerate(_KINDS)}
+_code_priorities: tuple[int, ...] = tuple(_priorities[kind] for kind in _KINDS)
+_RIGHT_ASSOCIATIVE_CODES: frozenset[int] = frozenset(OPCODES[kind] for kind in _RIGHT_ASSOCIATIVE)
 
 
 def get_priority(kind: str) -> int:
     return _priorities[kind]
 
 
-def power_set(args: list[SetWrapper[set_element_t]]) -> SetWrapper[set_element_t]:
-    s = args[0]
-    ps: SetWrapper = SetWrapper()
-    # Empty
-    ps.add(SetWrapper())
+def priority_of(code: int) -> int:
+    return _code_priorities[code]
+
 
-    # Individual
-    for e in s:
-        ps.add(SetWrapper({e}))
+def is_set(value: set_element_t) -> bool:
+    return isinstance(value, (*_SET_TYPES, SetView))
 
-    # Combinations
-    for i in range(2, len(s)):
-        for comb in combinations(s, r=i):
-            ps.add(SetWrapper(comb))
-    ps.add(s)
-    return ps
 
+def power_set(args: list[set_t]) -> set_t:
+    """ Lazy power set; subsets are only built when iterated or materialized. """
+    if len(args) != 1 or not is_set(args[0]):
+        raise EvaluateError("P expects a single Set.")
+    return PowerSetView(args[0])
 
-def is_improper_subset(left: SetWrapper[set_element_t], right: SetWrapper[set_element_t]) -> bool:
+
+def is_improper_subset(left: set_t, right: set_t) -> bool:
+    by_bounds: bool | None = interval_is_subset(left, right)
+    if by_bounds is not None:
+        return by_bounds
+    by_mask: bool | None = bitset_is_subset(left, right)
+    if by_mask is not None:
+        return by_mask
+    by_array: bool | None = numeric_is_subset(left, right)
+    if by_array is not None:
+        return by_array
+    if isinstance(left, PowerSetView) and isinstance(right, PowerSetView):
+        return is_improper_subset(left.base, right.base)
+    if isinstance(left, CartesianProductView) and isinstance(right, CartesianProductView):
+        return left.is_subset(right)
+    if size(left) > size(right):
+        return False
     for i in left:
         if i not in right:
             return False
     return True
 
 
-def is_proper_subset(left: SetWrapper[set_element_t], right: SetWrapper[set_element_t]):
-    return (len(left) < len(right)) and is_improper_subset(left, right)
+def is_proper_subset(left: set_t, right: set_t):
+    return (size(left) < size(right)) and is_improper_subset(left, right)
 
 
-def cartesian_product(left: SetWrapper[set_element_t], right: SetWrapper[set_element_t]) -> SetWrapper[set_element_t]:
-    result: SetWrapper[set_element_t] = SetWrapper()
-    for x in left:
-        for y in right:
-            result.add((x, y))
-
-    return result
+def cartesian_product(left: set_t, right: set_t) -> set_t:
+    """ Lazy product; pairs are only built when iterated or materialized. """
+    return CartesianProductView(left, right)
 
 
 _evaluations: dict[str, Callable[[set_element_t, set_element_t], set_element_t]] = {
     # Return Set
-    "UNION": lambda l, r: SetWrapper(l.union(r)),
-    "INTERSECT": lambda l, r: SetWrapper(l.intersection(r)),
-    "DIFFERENCE": lambda l, r: SetWrapper(l.difference(r)),
-    "SYMMETRIC_DIFFERENCE": lambda l, r: SetWrapper(l.symmetric_difference(r)),
+    "UNION": lambda l, r: FrozenSetWrapper.from_normalized(l.union(r)),
+    "INTERSECT": lambda l, r: FrozenSetWrapper.from_normalized(l.intersection(r)),
+    "DIFFERENCE": lambda l, r: FrozenSetWrapper.from_normalized(l.difference(r)),
+    "SYMMETRIC_DIFFERENCE": lambda l, r: FrozenSetWrapper.from_normalized(l.symmetric_difference(r)),
     "CARTESIAN": cartesian_product,
 
     # Return Boolean
@@ -81,19 +108,135 @@ _evaluations: dict[str, Callable[[set_element_t, set_element_t], set_element_t]]
 }
 
 
-def evaluate(op: str, left: set_element_t, right: set_element_t) -> set_element_t:
-    # Invalid Operations
-    if op in _SET_OPERATORS and (type(left) != SetWrapper or type(right) != SetWrapper):
-        return False
+# Subset tests between hash sets, done by the built-in comparisons
+_concrete_subsets: dict[str, _handler_t] = {
+    "IMPROPER_SUBSET": lambda l, r: l <= r,
+    "PROPER_SUBSET": lambda l, r: l < r,
+    "NOT_SUBSET": lambda l, r: not l < r,
+}
 
-    if op in _BOOL_OPERATORS and (type(left) in (Number, bool) and type(right) in (Number, bool)):
-        return False
 
-    if op in ("PROPER_SUBSET", "IMPROPER_SUBSET"):
-        if SetWrapper not in (type(left), type(right)):
-            return False
+def _false(left: set_element_t, right: set_element_t) -> bool:
+    return False
 
-    # Evaluations
-    if op in _evaluations:
-        return _evaluations[op](left, right)
+
+def _lazy_set_operation(op: str, left: set_t, right: set_t) -> set_t:
+    """ Set operation where an operand is a view; special representations are tried before materializing. """
+    # Ranges combine by their bounds; removing elements from a range stays lazy
+    by_bounds: set_t | None = interval_evaluate(op, left, right)
+    if by_bounds is not None:
+        return by_bounds
+    # Sets drawn from the universe S run as big-int operations
+    by_mask: set_t | None = bitset_evaluate(op, left, right)
+    if by_mask is not None:
+        return by_mask
+    # Purely numeric sets run as merges over sorted arrays
+    by_array: set_t | None = numeric_evaluate(op, left, right)
+    if by_array is not None:
+        return by_array
+    if op not in _evaluations:
+        raise EvaluateError(f"Invalid Operation: {left} {op} {right}")
+    return _evaluations[op](materialize(left), materialize(right))
+
+
+def _invalid(op: str, left: set_element_t, right: set_element_t) -> set_element_t:
     raise EvaluateError(f"Invalid Operation: {left} {op} {right}")
+
+
+def _resolve(code: int, left: type, right: type) -> _handler_t:
+    """ Chooses the handler of an operator for one pair of operand types.
+    Invalid combinations resolve to a handler of their constant result, so they cost nothing to check again. """
+    op: str = _KINDS[code]
+    sets: bool = issubclass(left, (*_SET_TYPES, SetView)) and issubclass(right, (*_SET_TYPES, SetView))
+    if op in _SET_OPERATORS:
+        if not sets:
+            return _false
+        if op == "CARTESIAN":
+            return cartesian_product  # Stays lazy itself
+        if issubclass(left, _SET_TYPES) and issubclass(right, _SET_TYPES) and op in _evaluations:
+            return _evaluations[op]
+        return partial(_lazy_set_operation, op)
+    if op in _BOOL_OPERATORS and left in (Number, bool) and right in (Number, bool):
+        return _false
+    if op in ("PROPER_SUBSET", "IMPROPER_SUBSET") and not sets:
+        return _false
+    if issubclass(left, _SET_TYPES) and issubclass(right, _SET_TYPES) and op in _concrete_subsets:
+        return _concrete_subsets[op]
+    if op in _evaluations:
+        return _evaluations[op]
+    return partial(_invalid, op)
+
+
+# (opcode, type(left), type(right)) -> handler; each combination is resolved the first time it is seen
+_handlers: dict[tuple[int, type, type], _handler_t] = {}
+
+
+def dispatch(code: int, left: set_element_t, right: set_element_t) -> set_element_t:
+    """ Evaluates the operator of the given opcode through the dispatch table. """
+    if budget.enabled:
+        budget.admit_operation(_KINDS[code], [left, right])
+    if instrumentation.enabled:
+        return instrumentation.timed(instrumentation.operators, _KINDS[code], lambda: _dispatch(code, left, right), (left, right))
+    return _dispatch(code, left, right)
+
+
+def _dispatch(code: int, left: set_element_t, right: set_element_t) -> set_element_t:
+    key: tuple[int, type, type] = (code, type(left), type(right))
+    handler: _handler_t | None = _handlers.get(key)
+    if handler is None:
+        handler = _handlers[key] = _resolve(*key)
+    return handler(left, right)
+
+
+def evaluate(op: str, left: set_element_t, right: set_element_t) -> set_element_t:
+    code: int | None = OPCODES.get(op)
+    if code is None:
+        raise EvaluateError(f"Invalid Operation: {left} {op} {right}")
+    return dispatch(code, left, right)
+
+
+def dispatch_chain(code: int, operands: list[set_element_t]) -> set_element_t:
+    """ Applies a chainable operator across every operand at once, such as A ∩ B ∩ C. """
+    if budget.enabled:
+        budget.admit_operation(_KINDS[code], operands)
+    if instrumentation.enabled:
+        return instrumentation.timed(instrumentation.operators, _KINDS[code], lambda: _dispatch_chain(code, operands), operands)
+    return _dispatch_chain(code, operands)
+
+
+def _dispatch_chain(code: int, operands: list[set_element_t]) -> set_element_t:
+    op: str = _KINDS[code]
+    if all(isinstance(o, _SET_TYPES) for o in operands):
+        if op == "UNION":
+            # One accumulator instead of N-1 intermediate sets; set-to-set updates reuse the stored hashes
+            every: set = set(operands[0])
+            for other in operands[1:]:
+                every.update(other)
+            return FrozenSetWrapper.from_normalized(every)
+        if op == "INTERSECT":
+            ordered: list[set_t] = sorted(operands, key=len)
+            common: set_t = ordered[0]
+            for other in ordered[1:]:
+                if not common:
+                    break  # Nothing left to intersect
+                common = common.intersection(other)
+            return FrozenSetWrapper.from_normalized(common)
+        odd: set = set(operands[0])  # Elements present in an odd number of operands
+        for other in operands[1:]:
+            odd.symmetric_difference_update(other)
+        return FrozenSetWrapper.from_normalized(odd)
+
+    if op == "INTERSECT" and all(is_set(o) for o in operands):
+        # Views keep their own representations pairwise, still smallest first
+        ordered = sorted(operands, key=size)
+        result: set_element_t = ordered[0]
+        for other in ordered[1:]:
+            if size(result) == 0:
+                break
+            result = _dispatch(code, result, other)
+        return result
+    # Same result as the left-to-right binary operations, including for non-set operands
+    result = operands[0]
+    for other in operands[1:]:
+        result = _dispatch(code, result, other)
+    return result
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, asdict
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Iterable, Mapping
+
+from conjuntos.model.views import SetView, size
+from conjuntos.model.wrapper import _SET_TYPES
+
+
+@dataclass
+class Timing:
+    """ Call count and latency of one operator, function or phase; sizes are summed cardinalities. """
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    input_size: int = 0
+    output_size: int = 0
+
+    def add(self, elapsed: float, input_size: int = 0, output_size: int = 0) -> None:
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.input_size += input_size
+        self.output_size += output_size
+
+
+def cardinality(value: Any) -> int:
+    """ Size of a set value (without enumerating views); 0 for anything else. """
+    if isinstance(value, (*_SET_TYPES, SetView)):
+        return size(value)
+    return 0
+
+
+class Instrumentation:
+    """ Opt-in counters for operators, registered functions and parser phases.
+    When disabled, callers only pay for reading the enabled flag; when enabled, updates are serialized across threads. """
+    def __init__(self):
+        self.enabled: bool = False
+        self._lock: Lock = Lock()
+        self.operators: dict[str, Timing] = {}
+        self.functions: dict[str, Timing] = {}
+        self.phases: dict[str, Timing] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.operators.clear()
+            self.functions.clear()
+            self.phases.clear()
+
+    def timed(self, table: dict[str, Timing], name: str, call: Callable[[], Any], inputs: Iterable[Any] = ()) -> Any:
+        """ Runs call() and records its latency and the cardinalities of the inputs and of the result. """
+        start: float = perf_counter()
+        result: Any = call()
+        elapsed: float = perf_counter() - start
+        input_size: int = sum(cardinality(i) for i in inputs)
+        output_size: int = cardinality(result)
+        with self._lock:
+            if name not in table:
+                table[name] = Timing()
+            table[name].add(elapsed, input_size, output_size)
+        return result
+
+    def record_phase(self, phase: str, elapsed: float) -> None:
+        with self._lock:
+            if phase not in self.phases:
+                self.phases[phase] = Timing()
+            self.phases[phase].add(elapsed)
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, float]]]:
+        """ Plain-dict copy of every counter, ready to be exported. """
+        def table(timings: Mapping[str, Timing]) -> dict[str, dict[str, float]]:
+            return {name: asdict(timing) for name, timing in timings.items()}
+        with self._lock:
+            return {"phases": table(self.phases), "operators": table(self.operators), "functions": table(self.functions)}
+
+
+# Shared by the evaluator, the expression nodes and the parser
+instrumentation: Instrumentation = Instrumentation()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Iterable, Iterator, Optional
+
+from conjuntos.model.budget import NUMBER_BYTES
+from conjuntos.model.views import SetView, size
+from conjuntos.model.wrapper import Number, _SET_TYPES
+
+# Inclusive integer bounds (start, stop) of one interval
+interval_t = tuple[int, int]
+
+
+def _normalized(intervals: Iterable[interval_t]) -> tuple[interval_t, ...]:
+    """ Sorts the intervals and merges the overlapping or adjacent ones; empty intervals are dropped. """
+    merged: list[list[int]] = []
+    for start, stop in sorted(i for i in intervals if i[0] <= i[1]):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return tuple((start, stop) for start, stop in merged)
+
+
+def _integer(item: Any) -> Optional[int]:
+    """ Value of an integral Number; None for anything else. """
+    if type(item) is not Number:
+        return None
+    value: float = item.value
+    if type(value) is float and not value.is_integer():
+        return None
+    return int(value)
+
+
+class IntervalSet(SetView):
+    """ Set of integers stored as disjoint inclusive intervals, such as {1..1000000}.
+    Membership and cardinality never enumerate the elements. """
+    label: str = "range"
+    element_bytes: int = NUMBER_BYTES
+
+    def __init__(self, intervals: Iterable[interval_t] = ()):
+        self.intervals: tuple[interval_t, ...] = _normalized(intervals)
+        self.starts: list[int] = [start for start, _ in self.intervals]
+        self._cardinality: int = sum(stop - start + 1 for start, stop in self.intervals)
+
+    @classmethod
+    def between(cls, start: Any, stop: Any) -> Optional[IntervalSet]:
+        """ {start..stop} of two integral Numbers, or None if a bound is not one. """
+        first, last = _integer(start), _integer(stop)
+        if first is None or last is None:
+            return None
+        return cls(((first, last),))
+
+    def cardinality(self) -> int:
+        return self._cardinality
+
+    def __contains__(self, item: Any) -> bool:
+        value: Optional[int] = _integer(item)
+        if value is None:
+            return False
+        i: int = bisect_right(self.starts, value) - 1
+        return i >= 0 and value <= self.intervals[i][1]
+
+    def __iter__(self) -> Iterator[Number]:
+        for start, stop in self.intervals:
+            for value in range(start, stop + 1):
+                yield Number(value)
+
+    def is_subset(self, other: IntervalSet) -> bool:
+        """ Every interval lies inside a single interval of other, since other's intervals are not adjacent. """
+        for start, stop in self.intervals:
+            i: int = bisect_right(other.starts, start) - 1
+            if i < 0 or stop > other.intervals[i][1]:
+                return False
+        return True
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, IntervalSet):
+            return self.intervals == other.intervals
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return super().__hash__()
+
+    def __str__(self) -> str:
+        if not self.intervals:
+            return "∅"
+        return " ∪ ".join('{' + (str(start) if start == stop else f"{start}..{stop}") + '}' for start, stop in self.intervals)
+
+
+class DifferenceView(SetView):
+    """ Lazy base - removed for a large base (the complement of a set in an IntervalSet S).
+    Only the removed elements are ever enumerated up front. """
+    label: str = "complement"
+
+    def __init__(self, base: SetView, removed: Any):
+        self.base: SetView = base
+        self.element_bytes: int = base.element_bytes
+        self.removed: Any = removed
+        self._cardinality: int = size(base) - sum(1 for e in removed if e in base)
+
+    def cardinality(self) -> int:
+        return self._cardinality
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self.base and item not in self.removed
+
+    def __iter__(self) -> Iterator[Any]:
+        removed: Any = self.removed
+        return (e for e in self.base if e not in removed)
+
+    def __hash__(self) -> int:
+        return super().__hash__()
+
+
+def _complement(intervals: tuple[interval_t, ...], start: int, stop: int) -> list[interval_t]:
+    """ The parts of [start, stop] outside the given intervals. """
+    gaps: list[interval_t] = []
+    for first, last in intervals:
+        if first > start:
+            gaps.append((start, min(first - 1, stop)))
+        start = max(start, last + 1)
+    gaps.append((start, stop))
+    return gaps
+
+
+def _difference(l: IntervalSet, r: IntervalSet) -> list[interval_t]:
+    result: list[interval_t] = []
+    for start, stop in l.intervals:
+        result.extend(_complement(r.intervals, start, stop))
+    return result
+
+
+def _intersection(l: IntervalSet, r: IntervalSet) -> list[interval_t]:
+    result: list[interval_t] = []
+    i: int = 0
+    j: int = 0
+    while i < len(l.intervals) and j < len(r.intervals):
+        (a, b), (c, d) = l.intervals[i], r.intervals[j]
+        result.append((max(a, c), min(b, d)))
+        if b < d:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+_interval_evaluations = {
+    "UNION": lambda l, r: l.intervals + r.intervals,
+    "INTERSECT": _intersection,
+    "DIFFERENCE": _difference,
+    "SYMMETRIC_DIFFERENCE": lambda l, r: _difference(l, r) + _difference(r, l),
+}
+
+
+def interval_evaluate(op: str, left: Any, right: Any) -> Optional[SetView]:
+    """ Interval arithmetic between IntervalSets; an IntervalSet minus a concrete set stays lazy.
+    None when the operation needs the full contents of the operands. """
+    if op not in _interval_evaluations or not isinstance(left, IntervalSet):
+        return None
+    if isinstance(right, IntervalSet):
+        return IntervalSet(_interval_evaluations[op](left, right))
+    if op == "DIFFERENCE" and isinstance(right, (*_SET_TYPES, SetView)):
+        return DifferenceView(left, right)
+    return None
+
+
+def interval_is_subset(left: Any, right: Any) -> Optional[bool]:
+    """ left ⊆ right by comparing interval bounds; None unless both are IntervalSets. """
+    if isinstance(left, IntervalSet) and isinstance(right, IntervalSet):
+        return left.is_subset(right)
+    return None
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, Optional
+
+from conjuntos.model.budget import NUMBER_BYTES
+from conjuntos.model.views import SetView
+from conjuntos.model.wrapper import Number, _SET_TYPES
+
+try:
+    import numpy
+except ImportError:  # No NumericSet is ever built; numeric sets stay hash sets
+    numpy = None
+
+# Smaller literals stay hash sets; the conversion only pays off on large sets
+NUMERIC_THRESHOLD: int = 1024
+
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+_FLOAT64_EXACT: int = 1 << 53  # Every int up to this magnitude is exactly a float64
+
+
+def _values(elements: Iterable[Any]) -> Optional[list]:
+    """ Raw values of elements, or None if one of them is not a Number. """
+    values: list = []
+    append = values.append
+    for e in elements:
+        if type(e) is not Number:
+            return None
+        append(e.value)
+    return values
+
+
+def _sorted_unique(values: list) -> Optional[Any]:
+    """ Sorted NumPy array of the distinct values: int64 when they are all ints that fit it, float64 when each one is
+    exactly a float64. None otherwise (or without NumPy): rounding would merge distinct values. """
+    if numpy is None:
+        return None
+    if all(type(v) is int for v in values):
+        if values and not (_INT64_MIN <= min(values) and max(values) <= _INT64_MAX):
+            return None
+        return numpy.unique(numpy.array(values, dtype=numpy.int64))
+    if any(type(v) is int and not -_FLOAT64_EXACT <= v <= _FLOAT64_EXACT for v in values):
+        return None
+    return numpy.unique(numpy.array(values, dtype=numpy.float64))
+
+
+class NumericSet(SetView):
+    """ Set of Numbers stored as a sorted NumPy array; only built when NumPy is installed.
+    Operations between NumericSets are merges and binary searches over the raw values. """
+    element_bytes: int = NUMBER_BYTES
+
+    def __init__(self, values: Any):
+        self.values: Any = values  # Sorted, without duplicates
+
+    @classmethod
+    def of(cls, elements: Iterable[Any]) -> Optional[NumericSet]:
+        """ NumericSet of elements, or None if any element is not a Number (or the values do not fit an array). """
+        if isinstance(elements, NumericSet):
+            return elements
+        if numpy is None:
+            return None
+        values: Optional[list] = _values(elements)
+        if values is None:
+            return None
+        return cls.from_values(values)
+
+    @classmethod
+    def from_values(cls, values: list) -> Optional[NumericSet]:
+        """ NumericSet of raw ints and floats, without boxing them as Numbers first; None if they do not fit an array. """
+        array: Optional[Any] = _sorted_unique(values)
+        return None if array is None else cls(array)
+
+    def cardinality(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, item: Any) -> bool:
+        if type(item) is not Number:
+            return False
+        values = self.values
+        i: int = int(numpy.searchsorted(values, item.value))
+        return i < len(values) and values[i] == item.value
+
+    def __iter__(self) -> Iterator[Number]:
+        return map(Number, self.values.tolist())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, NumericSet):
+            return len(self.values) == len(other.values) and bool((self.values == other.values).all())
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return super().__hash__()
+
+
+def _merge(op: str, l: Any, r: Any) -> Any:
+    if op == "UNION":
+        return numpy.union1d(l, r)
+    if op == "INTERSECT":
+        return numpy.intersect1d(l, r, assume_unique=True)
+    if op == "DIFFERENCE":
+        return numpy.setdiff1d(l, r, assume_unique=True)
+    return numpy.setxor1d(l, r, assume_unique=True)
+
+
+def _as_numeric(left: Any, right: Any) -> Optional[tuple[NumericSet, NumericSet]]:
+    """ Both operands as NumericSets when one already is and the other holds only Numbers. """
+    if not (isinstance(left, NumericSet) or isinstance(right, NumericSet)):
+        return None
+    if not isinstance(left, (*_SET_TYPES, NumericSet)) or not isinstance(right, (*_SET_TYPES, NumericSet)):
+        return None
+    l: Optional[NumericSet] = NumericSet.of(left)
+    if l is None:
+        return None
+    r: Optional[NumericSet] = NumericSet.of(right)
+    if r is None:
+        return None
+    return l, r
+
+
+def numeric_evaluate(op: str, left: Any, right: Any) -> Optional[NumericSet]:
+    """ Runs a set operation over sorted arrays; None when an operand is not purely numeric. """
+    if op not in ("UNION", "INTERSECT", "DIFFERENCE", "SYMMETRIC_DIFFERENCE"):
+        return None
+    operands: Optional[tuple[NumericSet, NumericSet]] = _as_numeric(left, right)
+    if operands is None:
+        return None
+    l, r = operands
+    return NumericSet(_merge(op, l.values, r.values))
+
+
+def numeric_is_subset(left: Any, right: Any) -> Optional[bool]:
+    """ left ⊆ right over the sorted arrays; None when an operand is not purely numeric. """
+    operands: Optional[tuple[NumericSet, NumericSet]] = _as_numeric(left, right)
+    if operands is None:
+        return None
+    l, r = operands
+    if len(l.values) == 0:
+        return True
+    if len(l.values) > len(r.values) or l.values[0] < r.values[0] or l.values[-1] > r.values[-1]:
+        return False  # Sorted bounds reject most non-subsets before any scan
+    return bool(numpy.isin(l.values, r.values, assume_unique=True).all())
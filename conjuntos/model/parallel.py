@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# Operands of the running operation, installed once in each worker by the pool initializer
+_shared: tuple = ()
+
+# Operations smaller than this never use the pool, and calibration probes are sized from it
+_MIN_SIZE: int = 1 << 13
+
+
+def _install(*operands: Any) -> None:
+    global _shared
+    _shared = operands
+
+
+# Worker tasks; module-level so the pool can pickle them
+def _product_chunk(start: int, stop: int) -> list[tuple]:
+    """ Pairs of left[start:stop] X right, with left and right installed by _install. """
+    left, right = _shared
+    return [(x, y) for x in left[start:stop] for y in right]
+
+
+def _power_set_range(start: int, stop: int, elements: Optional[list[Any]] = None) -> list[frozenset]:
+    """ Subsets start..stop-1 in the Gray-code order of PowerSetView; elements default to the installed ones. """
+    if elements is None:
+        elements = _shared[0]
+    gray: int = start ^ (start >> 1)
+    current: set = {e for i, e in enumerate(elements) if (gray >> i) & 1}
+    subsets: list[frozenset] = [frozenset(current)]
+    for i in range(start + 1, stop):
+        e = elements[(i & -i).bit_length() - 1]
+        if e in current:
+            current.remove(e)
+        else:
+            current.add(e)
+        subsets.append(frozenset(current))
+    return subsets
+
+
+def _bounds(n: int, parts: int) -> list[tuple[int, int]]:
+    """ parts contiguous ranges covering 0..n-1. """
+    step: int = max(1, -(-n // parts))
+    return [(start, min(start + step, n)) for start in range(0, n, step)]
+
+
+class ParallelBackend:
+    """ Opt-in process pool for building large cartesian products and power sets.
+    Each operation starts a pool whose initializer installs its operands once per worker; the workers build
+    contiguous ranges of the result, merged in the order of the serial path. Set operations and subset tests between
+    hash sets stay serial: the built-in operators beat shipping the operands to other processes.
+    An operation uses the pool only from the size where it pays off. Unless given, that size is measured by
+    calibrate() on first use: when the pool is never faster on this machine, the threshold is None and every
+    operation stays serial. """
+    def __init__(self, product_threshold: Optional[int] = None, power_set_threshold: Optional[int] = None):
+        self.enabled: bool = False
+        self.workers: int = 0
+        self.thresholds: dict[str, Optional[int]] = {"product": product_threshold, "power_set": power_set_threshold}
+        self.calibrated: bool = product_threshold is not None and power_set_threshold is not None
+        self.measurements: dict[str, dict[str, float]] = {}  # Seconds per item and pool overhead found by calibrate()
+
+    def enable(self, workers: Optional[int] = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def worth(self, kind: str, size: int) -> bool:
+        """ Whether an operation of the given kind ("product" or "power_set") and size should use the pool. """
+        if not self.enabled or size < _MIN_SIZE:
+            return False
+        if not self.calibrated:
+            self.calibrate()
+        threshold: Optional[int] = self.thresholds[kind]
+        return threshold is not None and size >= threshold
+
+    def _run(self, task: Callable[..., list], shared: tuple, ranges: list[tuple[int, int]]) -> Iterator[Any]:
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_install, initargs=shared) as pool:
+            for part in pool.map(task, *zip(*ranges)):
+                yield from part
+
+    def product(self, left: Iterable[Any], right: Iterable[Any]) -> Iterator[tuple]:
+        """ Pairs of left X right, split by runs of left elements. """
+        left, right = list(left), list(right)
+        return self._run(_product_chunk, (left, right), _bounds(len(left), self.workers))
+
+    def power_set(self, elements: Iterable[Any]) -> Iterator[frozenset]:
+        """ Subsets of elements, split by ranges of subset indexes. """
+        elements = list(elements)
+        return self._run(_power_set_range, (elements,), _bounds(1 << len(elements), self.workers))
+
+    # Calibration
+    def calibrate(self) -> None:
+        """ Times each operation serially and through the pool at two sizes, then sets the threshold where the pool's
+        fixed overhead is paid back by its lower cost per item (None when its cost per item is not lower). """
+        probes: dict[str, tuple[Callable[[int], Callable[[], Any]], Callable[[int], Callable[[], Any]]]] = {
+            "product": (
+                lambda n: lambda: frozenset((x, y) for x in range(n // 64) for y in range(64)),
+                lambda n: lambda: frozenset(self.product(range(n // 64), range(64))),
+            ),
+            "power_set": (
+                lambda n: lambda: frozenset(_power_set_range(0, n, list(range(n.bit_length() - 1)))),
+                lambda n: lambda: frozenset(self.power_set(range(n.bit_length() - 1))),
+            ),
+        }
+        small, large = _MIN_SIZE, _MIN_SIZE << 3
+        for kind, (serial, pooled) in probes.items():
+            if self.thresholds[kind] is not None:
+                continue
+            serial_cost: float = _best(serial(large)) / large
+            pool_small, pool_large = _best(pooled(small)), _best(pooled(large))
+            pool_cost: float = max(0.0, (pool_large - pool_small) / (large - small))
+            overhead: float = max(0.0, pool_small - pool_cost * small)
+            self.measurements[kind] = {"serial_per_item": serial_cost, "pool_per_item": pool_cost, "pool_overhead": overhead}
+            if pool_cost < serial_cost:
+                self.thresholds[kind] = max(_MIN_SIZE, int(overhead / (serial_cost - pool_cost)) + 1)
+        self.calibrated = True
+
+
+def _best(run: Callable[[], Any], repeat: int = 2) -> float:
+    """ Fastest of a few timed runs, in seconds. """
+    times: list[float] = []
+    for _ in range(repeat):
+        start: float = perf_counter()
+        run()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+# Shared by the views; disabled until enable() is called
+parallel: ParallelBackend = ParallelBackend()
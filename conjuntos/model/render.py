@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Optional, TextIO
+
+from conjuntos.model.budget import budget, format_count
+from conjuntos.model.views import SetView, size
+from conjuntos.model.wrapper import _SET_TYPES
+
+# Unmaterialized views larger than this are printed straight from their iterator instead of being built first
+_STREAM_SIZE: int = 1 << 16
+
+
+def _elements(value: Any) -> Iterable[Any]:
+    if isinstance(value, SetView):
+        if value._materialized is None and size(value) > _STREAM_SIZE:
+            return budget.paced(iter(value))
+        return value.materialize()
+    return value
+
+
+def render(value: Any, out: TextIO, limit: Optional[int] = None) -> None:
+    """ Writes value to out one element at a time, so that large sets are never turned into one huge string.
+    With a limit, only the first limit elements are written, followed by how many were left out. """
+    if not isinstance(value, (*_SET_TYPES, SetView)):
+        print(value, file=out)
+        return
+    if not value:
+        print("∅", file=out)
+        return
+    out.write('{')
+    written: int = 0
+    try:
+        for element in _elements(value):
+            if limit is not None and written >= limit:
+                out.write(f", … ({format_count(size(value) - written)} more)")
+                break
+            if written:
+                out.write(", ")
+            out.write(str(element))
+            written += 1
+    finally:  # Closes the line even when the time budget interrupts the output
+        out.write("}\n")
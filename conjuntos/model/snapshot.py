@@ -0,0 +1,310 @@
+""" Binary snapshots of a variable table.
+
+Layout: MAGIC | records | record offsets | directory | footer | MAGIC
+Every distinct value is one record, written after the records it refers to, so repeated subsets are stored once.
+Loading maps the file into memory; with lazy=True a variable is only decoded on first access.
+Typed arrays are stored in the byte order of the machine that wrote them.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from array import array
+from typing import Any, BinaryIO, Iterator, Mapping, MutableMapping, Optional
+
+from conjuntos.parser.exceptions import EvaluateError
+from conjuntos.model.bitset import BitSet, Universe
+from conjuntos.model.intervals import DifferenceView, IntervalSet
+from conjuntos.model.numeric import NumericSet, numpy
+from conjuntos.model.views import CartesianProductView, PowerSetView
+from conjuntos.model.wrapper import FrozenSetWrapper, Number, SetWrapper
+
+MAGIC: bytes = b"CJS1"
+_FOOTER: struct.Struct = struct.Struct("<4Q")  # records, offsets position, directory position, variables
+_U64: struct.Struct = struct.Struct("<Q")
+_I64: struct.Struct = struct.Struct("<q")
+_F64: struct.Struct = struct.Struct("<d")
+
+# Record tags
+_INT, _BIG_INT, _FLOAT, _BOOL, _STR, _SET, _NUMBERS, _TUPLE = range(8)
+_UNIVERSE, _BITSET, _NUMERIC, _INTERVALS, _POWER_SET, _PRODUCT, _DIFFERENCE = range(8, 15)
+_PLAIN_FLOAT, _PLAIN_INT = 15, 16  # Built-in numbers, such as the constant PI
+
+
+def _ids(ids: list[int]) -> bytes:
+    """ Record ids as a typed array; 32-bit while they fit. """
+    typecode: str = 'I' if not ids or max(ids) < (1 << 32) else 'Q'
+    return typecode.encode() + _U64.pack(len(ids)) + array(typecode, ids).tobytes()
+
+
+def _raw_numbers(values: Any) -> Optional[bytes]:
+    """ int64 or float64 values as a typed array; None if a value would lose precision. """
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        typecode: str = 'q' if values.dtype.kind == 'i' else 'd'
+        return typecode.encode() + _U64.pack(len(values)) + values.astype("<i8" if typecode == 'q' else "<f8").tobytes()
+    if not isinstance(values, array):
+        ints: list[int] = [v for v in values if type(v) is int]
+        if len(ints) == len(values) and all(-(1 << 63) <= v < (1 << 63) for v in ints):
+            values = array('q', values)
+        elif all(abs(v) <= (1 << 53) for v in ints):
+            values = array('d', values)
+        else:
+            return None
+    return values.typecode.encode() + _U64.pack(len(values)) + values.tobytes()
+
+
+class _Writer:
+    def __init__(self, out: BinaryIO):
+        self.out: BinaryIO = out
+        self.position: int = len(MAGIC)
+        self.offsets: array = array('Q')
+        self.memo: dict[Any, int] = {}
+        out.write(MAGIC)
+
+    def _record(self, tag: int, payload: bytes) -> int:
+        self.offsets.append(self.position)
+        self.out.write(bytes((tag,)))
+        self.out.write(payload)
+        self.position += 1 + len(payload)
+        return len(self.offsets) - 1
+
+    @staticmethod
+    def _key(value: Any) -> Any:
+        """ Equal immutable values share a record; mutable sets and views are shared by identity. """
+        if isinstance(value, (SetWrapper, BitSet, Universe, NumericSet, IntervalSet, PowerSetView, CartesianProductView, DifferenceView)):
+            return id(value)
+        try:
+            hash(value)
+        except TypeError:  # A tuple holding a mutable set
+            return id(value)
+        return type(value), value
+
+    def write(self, value: Any) -> int:
+        """ Writes value (after its parts) and returns its record id. """
+        key: Any = self._key(value)
+        if key in self.memo:
+            return self.memo[key]
+        record: int = self._encode(value)
+        self.memo[key] = record
+        return record
+
+    def _encode(self, value: Any) -> int:
+        if type(value) is bool:
+            return self._record(_BOOL, bytes((value,)))
+        if type(value) is Number:
+            v = value.value
+            if type(v) is float:
+                return self._record(_FLOAT, _F64.pack(v))
+            if -(1 << 63) <= v < (1 << 63):
+                return self._record(_INT, _I64.pack(v))
+            raw: bytes = v.to_bytes((v.bit_length() + 8) // 8, "little", signed=True)
+            return self._record(_BIG_INT, _U64.pack(len(raw)) + raw)
+        if type(value) is float:
+            return self._record(_PLAIN_FLOAT, _F64.pack(value))
+        if type(value) is int:
+            raw = value.to_bytes((value.bit_length() + 8) // 8, "little", signed=True)
+            return self._record(_PLAIN_INT, _U64.pack(len(raw)) + raw)
+        if type(value) is str:
+            raw = value.encode("utf-8")
+            return self._record(_STR, _U64.pack(len(raw)) + raw)
+        if type(value) is tuple:
+            return self._record(_TUPLE, _ids([self.write(e) for e in value]))
+        if isinstance(value, (FrozenSetWrapper, SetWrapper)):
+            if value and all(type(e) is Number for e in value):
+                raw = _raw_numbers([e.value for e in value])
+                if raw is not None:
+                    return self._record(_NUMBERS, raw)
+            return self._record(_SET, _ids([self.write(e) for e in value]))
+        if isinstance(value, Universe):
+            return self._record(_UNIVERSE, _ids([self.write(e) for e in value.elements]))
+        if isinstance(value, BitSet):
+            raw = value.mask.to_bytes((value.mask.bit_length() + 7) // 8, "little")
+            return self._record(_BITSET, _U64.pack(self.write(value.universe)) + _U64.pack(len(raw)) + raw)
+        if isinstance(value, NumericSet):
+            return self._record(_NUMERIC, _raw_numbers(value.values))  # Already int64 or float64
+        if isinstance(value, IntervalSet):
+            raw = _raw_numbers([bound for interval in value.intervals for bound in interval])
+            if raw is None or raw[:1] != b'q':
+                raise EvaluateError(f"Cannot save a range with bounds outside 64 bits: {value}")
+            return self._record(_INTERVALS, raw)
+        if isinstance(value, PowerSetView):
+            return self._record(_POWER_SET, _U64.pack(self.write(value.base)))
+        if isinstance(value, CartesianProductView):
+            return self._record(_PRODUCT, _U64.pack(self.write(value.left)) + _U64.pack(self.write(value.right)))
+        if isinstance(value, DifferenceView):
+            return self._record(_DIFFERENCE, _U64.pack(self.write(value.base)) + _U64.pack(self.write(value.removed)))
+        raise EvaluateError(f"Cannot save value of type {type(value).__name__}: {value}")
+
+
+def save(variables: Mapping[str, Any], path: str) -> int:
+    """ Writes the variables to path (through a temporary file, so a failed save keeps the old snapshot).
+    Returns the number of records written. """
+    temporary: str = path + ".tmp"
+    try:
+        with open(temporary, "wb") as out:
+            writer: _Writer = _Writer(out)
+            directory: list[tuple[str, int]] = [(name, writer.write(value)) for name, value in variables.items()]
+            offsets_position: int = writer.position
+            out.write(writer.offsets.tobytes())
+            directory_position: int = offsets_position + len(writer.offsets) * writer.offsets.itemsize
+            for name, record in directory:
+                raw: bytes = name.encode("utf-8")
+                out.write(_U64.pack(len(raw)) + raw + _U64.pack(record))
+            out.write(_FOOTER.pack(len(writer.offsets), offsets_position, directory_position, len(directory)))
+            out.write(MAGIC)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    os.replace(temporary, path)
+    return len(writer.offsets)
+
+
+class _Reader:
+    """ Decodes records straight from the memory-mapped file; each record is decoded at most once. """
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            # Checked before mapping: an empty file cannot be mapped at all
+            if os.fstat(f.fileno()).st_size < len(MAGIC) * 2 + _FOOTER.size:
+                raise EvaluateError(f"'{path}' is not a workspace snapshot.")
+            self.data: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data: mmap.mmap = self.data
+        end: int = len(data) - len(MAGIC)
+        if data[:len(MAGIC)] != MAGIC or data[end:] != MAGIC:
+            raise EvaluateError(f"'{path}' is not a workspace snapshot.")
+        records, offsets_position, position, count = _FOOTER.unpack_from(data, end - _FOOTER.size)
+        if offsets_position + records * 8 > end or position > end:
+            raise EvaluateError(f"Corrupted snapshot '{path}': truncated record table.")
+        self.offsets: array = array('Q')
+        self.offsets.frombytes(data[offsets_position:offsets_position + records * 8])
+        self.directory: dict[str, int] = {}
+        try:
+            for _ in range(count):
+                (length,) = _U64.unpack_from(data, position)
+                name: str = data[position + 8:position + 8 + length].decode("utf-8")
+                (self.directory[name],) = _U64.unpack_from(data, position + 8 + length)
+                position += 16 + length
+        except (struct.error, UnicodeDecodeError):
+            raise EvaluateError(f"Corrupted snapshot '{path}': truncated directory.") from None
+        if any(record >= records for record in self.directory.values()):
+            raise EvaluateError(f"Corrupted snapshot '{path}': unknown record.")
+        self.memo: dict[int, Any] = {}
+
+    def _ids(self, position: int) -> list[int]:
+        typecode: str = chr(self.data[position])
+        (count,) = _U64.unpack_from(self.data, position + 1)
+        ids: array = array(typecode)
+        ids.frombytes(self.data[position + 9:position + 9 + count * ids.itemsize])
+        return ids.tolist()
+
+    def _raw_numbers(self, position: int) -> array:
+        values: array = array(chr(self.data[position]))
+        (count,) = _U64.unpack_from(self.data, position + 1)
+        values.frombytes(self.data[position + 9:position + 9 + count * values.itemsize])
+        return values
+
+    def decode(self, record: int) -> Any:
+        if record in self.memo:
+            return self.memo[record]
+        try:
+            value: Any = self._decode(record)
+        except (struct.error, IndexError):  # Offsets or lengths pointing past the end of the file
+            raise EvaluateError(f"Corrupted snapshot: record {record} is truncated.") from None
+        self.memo[record] = value
+        return value
+
+    def _decode(self, record: int) -> Any:
+        data: mmap.mmap = self.data
+        position: int = self.offsets[record]
+        tag: int = data[position]
+        position += 1
+        if tag == _INT:
+            return Number(_I64.unpack_from(data, position)[0])
+        if tag == _FLOAT:
+            return Number(_F64.unpack_from(data, position)[0])
+        if tag == _BIG_INT:
+            (length,) = _U64.unpack_from(data, position)
+            return Number(int.from_bytes(data[position + 8:position + 8 + length], "little", signed=True))
+        if tag == _PLAIN_FLOAT:
+            return _F64.unpack_from(data, position)[0]
+        if tag == _PLAIN_INT:
+            (length,) = _U64.unpack_from(data, position)
+            return int.from_bytes(data[position + 8:position + 8 + length], "little", signed=True)
+        if tag == _BOOL:
+            return bool(data[position])
+        if tag == _STR:
+            (length,) = _U64.unpack_from(data, position)
+            return data[position + 8:position + 8 + length].decode("utf-8")
+        if tag == _TUPLE:
+            return tuple(self.decode(i) for i in self._ids(position))
+        if tag == _SET:
+            return FrozenSetWrapper.from_normalized([self.decode(i) for i in self._ids(position)])
+        if tag == _NUMBERS:
+            return FrozenSetWrapper.from_normalized(map(Number, self._raw_numbers(position)))
+        if tag == _UNIVERSE:
+            return Universe(self.decode(i) for i in self._ids(position))
+        if tag == _BITSET:
+            universe: Universe = self.decode(_U64.unpack_from(data, position)[0])
+            (length,) = _U64.unpack_from(data, position + 8)
+            return BitSet(universe, int.from_bytes(data[position + 16:position + 16 + length], "little"))
+        if tag == _NUMERIC:
+            values: array = self._raw_numbers(position)
+            if numpy is None:  # Saved where NumPy was installed; read back as a hash set
+                return FrozenSetWrapper.from_normalized(map(Number, values))
+            return NumericSet(numpy.frombuffer(values, dtype=numpy.int64 if values.typecode == 'q' else numpy.float64))
+        if tag == _INTERVALS:
+            bounds: array = self._raw_numbers(position)
+            return IntervalSet(zip(bounds[::2], bounds[1::2]))
+        if tag == _POWER_SET:
+            return PowerSetView(self.decode(_U64.unpack_from(data, position)[0]))
+        if tag == _PRODUCT:
+            left, right = struct.unpack_from("<2Q", data, position)
+            return CartesianProductView(self.decode(left), self.decode(right))
+        if tag == _DIFFERENCE:
+            base, removed = struct.unpack_from("<2Q", data, position)
+            return DifferenceView(self.decode(base), self.decode(removed))
+        raise EvaluateError(f"Corrupted snapshot: unknown record tag {tag}.")
+
+
+class LazyVariables(MutableMapping[str, Any]):
+    """ Variable table backed by a snapshot; each variable is decoded on first access. """
+    def __init__(self, reader: _Reader):
+        self._reader: _Reader = reader
+        self._pending: dict[str, int] = dict(reader.directory)  # Names not decoded yet
+        self._values: dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._pending:
+            self._values[name] = self._reader.decode(self._pending.pop(name))
+        return self._values[name]
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        self._pending.pop(name, None)
+        self._values[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        if self._pending.pop(name, None) is None:
+            del self._values[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._values or name in self._pending
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._values
+        yield from self._pending
+
+    def __len__(self) -> int:
+        return len(self._values) + len(self._pending)
+
+    def decoded(self) -> int:
+        """ Number of variables decoded (or assigned) so far. """
+        return len(self._values)
+
+
+def load(path: str, lazy: bool = False) -> MutableMapping[str, Any]:
+    """ Reads a snapshot written by save(); with lazy=True, variables are decoded on first access. """
+    reader: _Reader = _Reader(path)
+    if lazy:
+        return LazyVariables(reader)
+    return {name: reader.decode(record) for name, record in reader.directory.items()}
+
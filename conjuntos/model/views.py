@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Iterator, Optional
+
+from conjuntos.model.budget import budget, PAIR_BYTES, SET_BYTES, SLOT_BYTES
+from conjuntos.model.parallel import parallel
+from conjuntos.model.wrapper import SetWrapper, FrozenSetWrapper, _SET_TYPES
+from conjuntos.parser.exceptions import EvaluateError
+
+# 2^n stops being a number Python can hold well before n reaches this
+_MAX_POWER_EXPONENT: int = 1 << 32
+
+
+class SetView(ABC):
+    """ Read-only set computed on demand; materializes into a FrozenSetWrapper only when the full contents are needed. """
+    _materialized: Optional[FrozenSetWrapper] = None
+    label: str = "set"
+    element_bytes: int = 0  # Bytes of each element created when materializing; 0 when the elements already exist
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Any]: ...
+
+    @abstractmethod
+    def __contains__(self, item: Any) -> bool: ...
+
+    @abstractmethod
+    def cardinality(self) -> int:
+        """ Number of elements, computed without enumerating them. """
+        ...
+
+    def __len__(self) -> int:
+        return self.cardinality()
+
+    def __bool__(self) -> bool:
+        return self.cardinality() > 0
+
+    def estimated_bytes(self) -> int:
+        """ Approximate memory taken by the materialized set, computed before building it. """
+        return SET_BYTES + self.cardinality() * (SLOT_BYTES + self.element_bytes)
+
+    def _admit(self) -> None:
+        """ Checks the budget before the view is first materialized. """
+        if budget.enabled and self._materialized is None:
+            budget.admit(f"Building this {self.label}", self.cardinality(), self.estimated_bytes())
+
+    def materialize(self) -> FrozenSetWrapper:
+        """ Builds (once) the equivalent FrozenSetWrapper. """
+        if self._materialized is None:
+            self._admit()
+            self._materialized = FrozenSetWrapper.from_normalized(budget.paced(iter(self)) if budget.enabled else iter(self))
+        return self._materialized
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (*_SET_TYPES, SetView)):
+            return NotImplemented
+        if self.cardinality() != size(other):
+            return False
+        return all(i in self for i in other)
+
+    def __hash__(self) -> int:
+        return hash(self.materialize())
+
+    def __str__(self) -> str:
+        return str(self.materialize())
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def size(s: SetWrapper | SetView) -> int:
+    """ Cardinality of a set or view; avoids len() overflow on huge views. """
+    if isinstance(s, SetView):
+        return s.cardinality()
+    return len(s)
+
+
+def materialize(s: Any) -> Any:
+    """ Returns the FrozenSetWrapper behind a view; other values are returned unchanged. """
+    if isinstance(s, SetView):
+        return s.materialize()
+    return s
+
+
+class PowerSetView(SetView):
+    """ Lazy power set P(base); members are tested as subsets of base and enumerated in Gray-code order. """
+    label: str = "power set"
+
+    def __init__(self, base: SetWrapper):
+        self.base: SetWrapper = base
+
+    def cardinality(self) -> int:
+        n: int = size(self.base)
+        if n > _MAX_POWER_EXPONENT:
+            raise EvaluateError(f"Power set of more than {_MAX_POWER_EXPONENT} elements is too large to count.")
+        return 2 ** n
+
+    def __contains__(self, item: Any) -> bool:
+        if not isinstance(item, (*_SET_TYPES, SetView)):
+            return False
+        if size(item) > size(self.base):
+            return False
+        return all(i in self.base for i in item)
+
+    def __iter__(self) -> Iterator[FrozenSetWrapper]:
+        elements: list = list(self.base)
+        current: set = set()
+        yield FrozenSetWrapper.from_normalized(())
+        for i in range(1, 2 ** len(elements)):
+            # Consecutive Gray codes differ by the bit of i's lowest set bit
+            e = elements[(i & -i).bit_length() - 1]
+            if e in current:
+                current.remove(e)
+            else:
+                current.add(e)
+            yield FrozenSetWrapper.from_normalized(current)
+
+    def estimated_bytes(self) -> int:
+        # Every subset is a new set, holding half of the base elements on average
+        n: int = size(self.base)
+        return SET_BYTES + self.cardinality() * (SLOT_BYTES + SET_BYTES + SLOT_BYTES * n // 2)
+
+    def materialize(self) -> FrozenSetWrapper:
+        self._admit()
+        if self._materialized is None and parallel.worth("power_set", self.cardinality()):
+            self._materialized = FrozenSetWrapper.from_normalized(
+                FrozenSetWrapper.from_normalized(s) for s in parallel.power_set(self.base))
+        return super().materialize()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PowerSetView):
+            return self.base == other.base
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return super().__hash__()
+
+
+class CartesianProductView(SetView):
+    """ Lazy cartesian product left X right; pairs are only built when iterated or materialized. """
+    label: str = "cartesian product"
+    element_bytes: int = PAIR_BYTES
+
+    def __init__(self, left: SetWrapper | SetView, right: SetWrapper | SetView):
+        self.left: SetWrapper | SetView = left
+        self.right: SetWrapper | SetView = right
+
+    def cardinality(self) -> int:
+        return size(self.left) * size(self.right)
+
+    def __contains__(self, item: Any) -> bool:
+        return type(item) == tuple and len(item) == 2 and item[0] in self.left and item[1] in self.right
+
+    def __iter__(self) -> Iterator[tuple]:
+        for x in self.left:
+            for y in self.right:
+                yield x, y
+
+    def materialize(self) -> FrozenSetWrapper:
+        self._admit()
+        if self._materialized is None and parallel.worth("product", self.cardinality()):
+            self._materialized = FrozenSetWrapper.from_normalized(parallel.product(self.left, self.right))
+        return super().materialize()
+
+    def is_subset(self, other: CartesianProductView) -> bool:
+        """ A X B ⊆ C X D holds when A X B is empty or when A ⊆ C and B ⊆ D. """
+        if not self:
+            return True
+        return all(x in other.left for x in self.left) and all(y in other.right for y in self.right)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CartesianProductView):
+            return self.is_subset(other) and other.is_subset(self)
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        return super().__hash__()
@@ -1,50 +1,177 @@
 from __future__ import annotations
 
-from typing import Iterable, TypeVar
+from math import log10
+from typing import Any, Iterable, TypeVar
+from weakref import WeakValueDictionary, ref
 
 _T = TypeVar("_T")
 
 
+def normalize(value: Any) -> Any:
+    """ Wraps built-in numbers as Number; other values are returned unchanged. """
+    if type(value) in (int, float):
+        return Number(value)
+    return value
+
+
 class SetWrapper(set):
     """ Wrapper for built-in set; for representation. """
     def __init__(self, iterable: Iterable[_T] = None):
         super().__init__()
         if iterable:
-            for i in iterable:
-                if type(i) in (int, float): self.add(Number(i))
-                else: self.add(i)
+            self.update(map(normalize, iterable))
 
     def __str__(self) -> str:
         if self:
             return '{' + ", ".join(str(i) for i in self) + '}'
         return "∅"
 
+    def __repr__(self) -> str:
+        return self.__str__()
+
     def __hash__(self) -> int:
         return hash(frozenset(self))
 
     def __eq__(self, other) -> bool:
         if type(self) != type(other):
-            return False
+            if isinstance(other, FrozenSetWrapper):
+                return super().__eq__(other)
+            # Lazy set views compare themselves against SetWrapper
+            return False if isinstance(other, (set, frozenset)) else NotImplemented
         return super().__eq__(other)
 
     @staticmethod
     def to_set(iterable: Iterable[_T]) -> SetWrapper[_T]:
-        new_set: SetWrapper[_T] = SetWrapper()
-        for i in iterable:
-            if type(i) in (int, float): new_set.add(Number(i))
-            else: new_set.add(i)
-        return new_set
+        return SetWrapper(iterable)
+
+
+class FrozenSetWrapper(frozenset):
+    """ Immutable set value; hashed once (frozenset caches its own hash) and safe to nest in other sets.
+    While interning is enabled, equal values are shared (see SetInterner). """
+    __slots__ = ()  # frozenset already supports weak references
+
+    def __new__(cls, iterable: Iterable[_T] = None):
+        if iterable is None:
+            value: FrozenSetWrapper = super().__new__(cls)
+        else:
+            value = super().__new__(cls, map(normalize, iterable))
+        return interning.intern(value) if interning.enabled else value
+
+    @classmethod
+    def from_normalized(cls, iterable: Iterable[_T]) -> FrozenSetWrapper[_T]:
+        """ Adopts elements that are already normalized (no int or float) without checking each one. """
+        value: FrozenSetWrapper = frozenset.__new__(cls, iterable)
+        return interning.intern(value) if interning.enabled else value
+
+    def __str__(self) -> str:
+        if self:
+            return '{' + ", ".join(str(i) for i in self) + '}'
+        return "∅"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    __hash__ = frozenset.__hash__  # The built-in slot itself: hashing runs no Python code
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, FrozenSetWrapper):
+            if hash(self) != hash(other):
+                return False
+            return frozenset.__eq__(self, other)
+        if isinstance(other, SetWrapper):
+            return frozenset.__eq__(self, other)
+        return False if isinstance(other, (set, frozenset)) else NotImplemented
+
+    def __ne__(self, other) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+
+# Concrete (materialized) set types
+_SET_TYPES: tuple[type, ...] = (SetWrapper, FrozenSetWrapper)
+
+
+class SetInterner:
+    """ Opt-in hash-consing of FrozenSetWrapper values.
+    While enabled, every immutable set built is replaced by the equal set already alive, if any, so nested workloads
+    share their subsets and equality between them short-circuits on identity. The table only holds weak references,
+    so a canonical set is dropped as soon as nothing else uses it. Tuples are not interned: built-in tuples cannot be
+    weakly referenced, and their set elements are interned anyway. """
+    def __init__(self):
+        self.enabled: bool = False
+        self.hits: int = 0
+        self.misses: int = 0
+        self._table: dict[ref, ref] = {}  # Each weak reference is both key and value, hashed and compared by its set
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        self._table.clear()
+
+    def intern(self, value: FrozenSetWrapper) -> FrozenSetWrapper:
+        """ The canonical set equal to value, which becomes canonical itself if there is none. """
+        key: ref = ref(value, self._discard)  # Lookup key, and the entry itself on a miss
+        found: ref | None = self._table.get(key)
+        if found is not None:
+            canonical: FrozenSetWrapper | None = found()
+            if canonical is not None:
+                self.hits += 1
+                return canonical
+        self.misses += 1
+        self._table[key] = key
+        return value
+
+    def _discard(self, key: ref) -> None:
+        # A dead weak reference keeps the hash computed while its set was alive
+        if self._table.get(key) is key:
+            del self._table[key]
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def info(self) -> dict[str, int]:
+        return dict(hits=self.hits, misses=self.misses, size=len(self._table))
+
+
+# Shared by every FrozenSetWrapper; disabled until enable() is called
+interning: SetInterner = SetInterner()
+
+
+def _scientific(value: int) -> str:
+    """ Approximate value of a huge integer, such as 1.234567e+12000, from its leading bits. """
+    shift: int = max(0, value.bit_length() - 64)
+    exponent: float = log10(value >> shift) + shift * log10(2)
+    return f"{10 ** (exponent % 1):.6f}e+{int(exponent)}"
 
 
 class Number:
     """ Wrapper for built-in int and float; for representation. """
+    __slots__ = ("value", "__weakref__")
+    _interned: WeakValueDictionary = WeakValueDictionary()
+
     def __init__(self, value: float) -> None:
         self.value: float = value
 
+    @classmethod
+    def of(cls, value: float) -> Number:
+        """ Returns the shared Number for value; equal literals reuse one instance while it is alive. """
+        number: Number | None = cls._interned.get(value)
+        if number is None:
+            number = cls(value)
+            cls._interned[value] = number
+        return number
+
     def __str__(self) -> str:
         if int(self.value) != self.value:
             return str(self.value)
-        return str(int(self.value))
+        try:
+            return str(int(self.value))
+        except ValueError:  # Too many digits to print, such as |P(P(A))|
+            return _scientific(int(self.value))
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -53,6 +180,8 @@ class Number:
         return hash(self.value)
 
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
         if type(self) != type(other):
             return False
         return self.value == other.value
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+# Type Alias
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+
+class LRUCache(Generic[_K, _V]):
+    """ Bounded mapping that evicts the least recently used entries; counts hits, misses and evictions.
+    By default every entry counts as 1 against max_size; a weight function makes the bound size-aware instead,
+    and values heavier than max_size on their own are not stored.
+    Safe to share between threads: lookups, insertions and evictions are serialized by one lock, since marking an
+    entry as recently used reorders the same list that evictions pop from. """
+    def __init__(self, max_size: int = 256, weight: Optional[Callable[[_V], int]] = None):
+        if max_size < 0:
+            raise ValueError("max_size must not be negative.")
+        self.max_size: int = max_size
+        self.weight: Optional[Callable[[_V], int]] = weight
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.total_weight: int = 0
+        self._entries: OrderedDict[_K, _V] = OrderedDict()
+        self._weights: dict[_K, int] = {}
+        self._lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: _K) -> bool:
+        return key in self._entries
+
+    def get(self, key: _K) -> Optional[_V]:
+        """ Returns the cached value, marking it as recently used, or None. """
+        with self._lock:
+            value: Optional[_V] = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: _K, value: _V) -> None:
+        """ Stores a value, evicting the oldest entries past max_size. """
+        weight: int = 1 if self.weight is None else self.weight(value)
+        if weight > self.max_size:
+            return
+        with self._lock:
+            self.total_weight += weight - self._weights.get(key, 0)
+            self._weights[key] = weight
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while self.total_weight > self.max_size:
+                oldest, _ = self._entries.popitem(last=False)
+                self.total_weight -= self._weights.pop(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """ Removes every entry and resets the counters. """
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.total_weight = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> dict[str, int]:
+        info: dict[str, int] = dict(hits=self.hits, misses=self.misses, evictions=self.evictions, size=len(self._entries),
+                                    max_size=self.max_size)
+        if self.weight is not None:
+            info["weight"] = self.total_weight
+        return info
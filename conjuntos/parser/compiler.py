@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import Iterable, Mapping, MutableMapping, Optional
+
+from conjuntos.parser.exceptions import ParseError
+from conjuntos.parser.nodes import Node, Literal, Var, SetLiteral, BulkSetLiteral, RangeLiteral, TupleLiteral, Call, Unary, Binary, Cardinality, Define
+from conjuntos.parser.tokenizer import Token
+from conjuntos.model.evaluator import set_element_t, set_function, priority_of, _UNARY_OPERATORS, _RIGHT_ASSOCIATIVE_CODES
+from conjuntos.model.wrapper import Number
+
+# Closing tokens and the group each one closes
+_GROUPS: dict[str, str] = {"CLOSE": "OPEN", "SET_CLOSE": "SET_OPEN"}
+
+
+class ParseState(Enum):
+    OPERAND = auto()
+    OPERATOR = auto()
+    END = auto()
+
+
+@dataclass(frozen=True)
+class Plan:
+    """ Immutable compiled expression; can be evaluated against any variable bindings. """
+    expression: str
+    root: Node
+    functions: Mapping[str, set_function] = field(default_factory=dict, compare=False, repr=False)
+    rewrites: tuple[str, ...] = ()  # Optimizer rewrites applied to root
+
+    @property
+    def is_definition(self) -> bool:
+        return isinstance(self.root, Define)
+
+    def evaluate(self, variables: MutableMapping[str, set_element_t]) -> Optional[set_element_t]:
+        """ Evaluates the plan; definitions are stored in variables and return None. """
+        value: set_element_t = self.root.evaluate(variables, self.functions)
+        return None if self.is_definition else value
+
+
+def _is_range(node: Node) -> bool:
+    """ Bounds a..b, which are only valid as the whole content of braces. """
+    return isinstance(node, Binary) and node.op == "RANGE"
+
+
+def _reduce(stack: deque[Token], operands: deque[Node]) -> None:
+    """ Applies the operator on top of the stack to the two topmost operands. """
+    op: Token = stack.pop()
+    right: Node = operands.pop()
+    left: Node = operands.pop()
+    if _is_range(left) or _is_range(right):
+        raise ParseError(f"Range at '{op.text}' must be enclosed in braces, such as {{1..10}}.")
+    if op.kind == "DEFINE":
+        if not isinstance(left, Var):
+            raise ParseError(f"Expected Variable Name. Instead got: '{left}'")
+        operands.append(Define(left.name, right))
+    else:
+        operands.append(Binary(op.kind, left, right))
+
+
+def _reduce_until(t: Token, stack: deque[Token], operands: deque[Node]) -> None:
+    """ Reduces every stacked operator that binds tighter than t. """
+    priority: int = priority_of(t.opcode)
+    while stack and stack[-1].opcode >= 0:
+        top_priority: int = priority_of(stack[-1].opcode)
+        if top_priority < priority or (top_priority == priority and t.opcode in _RIGHT_ASSOCIATIVE_CODES):
+            break
+        _reduce(stack, operands)
+
+
+def _reduce_all(stack: deque[Token], operands: deque[Node]) -> None:
+    """ Reduces every stacked operator down to the innermost open group. """
+    while stack and stack[-1].opcode >= 0:
+        _reduce(stack, operands)
+
+
+def build_tree(tokens: Iterable[Token]) -> Node:
+    """ Shunting-yard over the tokens; returns the expression tree without evaluating it. """
+    state: ParseState = ParseState.OPERAND
+    stack: deque[Token] = deque()
+    operands: deque[Node] = deque()
+    depths: deque[int] = deque()  # operand count when each group was opened
+    previous: Token = Token()
+
+    for t in tokens:
+        if state == ParseState.OPERAND:
+            if t.kind == "NUMBER":
+                operands.append(Literal(Number.of(t.value)))
+                state = ParseState.OPERATOR
+            elif t.kind == "VAR":
+                operands.append(Var(t.text))
+                state = ParseState.OPERATOR
+            elif t.kind == "SET_LITERAL":
+                operands.append(BulkSetLiteral.of(t.items))
+                state = ParseState.OPERATOR
+            elif t.kind in ("OPEN", "SET_OPEN", "CARDINALITY"):
+                stack.append(t)
+                depths.append(len(operands))
+            elif t.kind in ("CLOSE", "SET_CLOSE") and stack and stack[-1].kind in ("CALL", "SET_OPEN") and len(operands) == depths[-1]:
+                # Empty group: {} or f()
+                opened: Token = stack.pop()
+                depths.pop()
+                if (opened.kind == "SET_OPEN") != (t.kind == "SET_CLOSE"):
+                    raise ParseError(f"Unexpected Token: '{t.text}' at position {t.start}.")
+                operands.append(SetLiteral() if opened.kind == "SET_OPEN" else Call(opened.text))
+                state = ParseState.OPERATOR
+            elif t.kind == "END":
+                raise ParseError("Unexpected end of expression; missing operand.")
+            else:
+                raise ParseError(f"Unexpected Token: '{t.text}' at position {t.start}.")
+
+        elif state == ParseState.OPERATOR:
+            if t.kind in _UNARY_OPERATORS:
+                operands.append(Unary(t.kind, operands.pop()))  # Postfix; binds tighter than any binary operator
+
+            elif t.kind == "END":
+                _reduce_all(stack, operands)
+                if stack:
+                    raise ParseError(f"Error at '{stack[-1].text}' missing closing symbol.")
+                state = ParseState.END
+                break
+
+            elif t.opcode >= 0:
+                _reduce_until(t, stack, operands)
+                stack.append(t)
+                state = ParseState.OPERAND
+
+            elif t.kind == "OPEN" and previous.kind == "VAR":
+                # Function call: the variable just read is the function name
+                name: Var = operands.pop()
+                stack.append(Token(kind="CALL", text=name.name))
+                depths.append(len(operands))
+                state = ParseState.OPERAND
+
+            elif t.kind == "SEP":
+                _reduce_all(stack, operands)
+                if not stack or stack[-1].kind not in ("CALL", "SET_OPEN", "OPEN"):
+                    raise ParseError("Separator ',' outside of a set, tuple or function call.")
+                state = ParseState.OPERAND
+
+            elif t.kind == "CARDINALITY":
+                # Closing bar: an operand was just read, so this '|' ends |expr| instead of opening one
+                _reduce_all(stack, operands)
+                if not stack or stack[-1].kind != "CARDINALITY":
+                    raise ParseError(f"Unexpected Token: '{t.text}' at position {t.start}; no open '|'.")
+                stack.pop()
+                depths.pop()
+                if _is_range(operands[-1]):
+                    raise ParseError("Range must be enclosed in braces, such as |{1..10}|.")
+                operands.append(Cardinality(operands.pop()))
+
+            elif t.kind in _GROUPS:
+                _reduce_all(stack, operands)
+                if not stack:
+                    raise ParseError(f"Unexpected Token: '{t.text}'; nothing to close.")
+                opened: Token = stack.pop()
+                depth: int = depths.pop()
+                items: tuple[Node, ...] = tuple(operands.pop() for _ in range(len(operands) - depth))[::-1]
+                if any(_is_range(item) for item in items):
+                    if opened.kind != "SET_OPEN" or len(items) != 1 or t.kind != "SET_CLOSE":
+                        raise ParseError(f"Range at position {opened.start} must be the only content of braces, such as {{1..10}}.")
+                    operands.append(RangeLiteral(items[0].left, items[0].right))
+                elif opened.kind == "CALL" and t.kind == "CLOSE":
+                    operands.append(Call(opened.text, items))
+                elif opened.kind != _GROUPS[t.kind]:
+                    raise ParseError(f"Error at '{opened.text}' mismatched '{t.text}'.")
+                elif opened.kind == "SET_OPEN":
+                    operands.append(SetLiteral(items))
+                elif len(items) == 1:
+                    operands.append(items[0])
+                else:
+                    operands.append(TupleLiteral(items))
+            else:
+                raise ParseError(f"Undefined behavior for: '{t.text}'")
+        previous = t
+
+    if state != ParseState.END:
+        raise ParseError("Expected END token.")
+    assert len(operands) == 1, f"Expected a single result. Instead got: {len(operands)}."
+    if _is_range(operands[-1]):
+        raise ParseError("Range must be enclosed in braces, such as {1..10}.")
+    return operands.pop()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Any, Hashable, Iterator, Mapping, Optional
+
+from conjuntos.model.bitset import BitSet
+from conjuntos.model.evaluator import is_set, set_element_t, set_function
+from conjuntos.model.intervals import IntervalSet
+from conjuntos.model.numeric import NumericSet
+from conjuntos.model.views import CartesianProductView, PowerSetView, SetView, size
+from conjuntos.parser.cache import LRUCache
+
+
+class _Identity:
+    """ Key that matches only the very same object, without hashing its contents; keeps the object alive. """
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value: Any = value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Identity) and other.value is self.value
+
+    def __hash__(self) -> int:
+        return id(self.value)
+
+
+# Sets up to this size are keyed by their elements, whatever their representation
+_CANONICAL_SIZE: int = 4096
+
+
+def structural_key(value: set_element_t) -> Hashable:
+    """ Hashable key equal for equal arguments, computed without materializing large lazy views.
+    Large views are keyed by their representation, or by identity when they have no cheap canonical form. """
+    if is_set(value) and (not isinstance(value, SetView) or size(value) <= _CANONICAL_SIZE):
+        return "set", frozenset(value)
+    if isinstance(value, IntervalSet):
+        return "intervals", value.intervals
+    if isinstance(value, NumericSet):
+        return "numbers", str(value.values.dtype), value.values.tobytes()
+    if isinstance(value, BitSet):
+        return "bits", _Identity(value.universe), value.mask
+    if isinstance(value, PowerSetView):
+        return "power", structural_key(value.base)
+    if isinstance(value, CartesianProductView):
+        return "product", structural_key(value.left), structural_key(value.right)
+    if isinstance(value, SetView):
+        return "view", _Identity(value)
+    return type(value), value
+
+
+def _weight(result: set_element_t) -> int:
+    """ Cost of keeping a result: its cardinality, since materialized views hold every element. """
+    return max(1, size(result)) if is_set(result) else 1
+
+
+class FunctionRegistry(Mapping[str, set_function]):
+    """ Functions callable from expressions, such as P.
+    Results of functions registered as pure are memoized under the structural key of their arguments, in a cache
+    bounded by the total cardinality of the stored results (max_elements). """
+    def __init__(self, functions: Optional[Mapping[str, set_function]] = None, pure: tuple[str, ...] = (),
+                 max_elements: int = 1_000_000):
+        self._functions: dict[str, set_function] = {}
+        self.pure: set[str] = set()
+        self.max_elements: int = max_elements
+        self.results: LRUCache[Hashable, set_element_t] = LRUCache(max_elements, weight=_weight)
+        for name, function in (functions or {}).items():
+            self.register(name, function, pure=name in pure)
+
+    def register(self, name: str, function: set_function, pure: bool = False) -> None:
+        """ Adds (or replaces) a function; pure functions must depend only on their arguments. """
+        self._functions[name] = function
+        self.pure.discard(name)
+        if pure:
+            self.pure.add(name)
+        self.invalidate()
+
+    def call(self, name: str, args: list[set_element_t]) -> set_element_t:
+        function: set_function = self._functions[name]
+        if name not in self.pure:
+            return function(args)
+        try:
+            key: Hashable = (name, tuple(structural_key(arg) for arg in args))
+            hash(key)
+        except TypeError:  # Unhashable argument, such as a list
+            return function(args)
+        result: Optional[set_element_t] = self.results.get(key)
+        if result is None:
+            result = function(args)
+            self.results.put(key, result)
+        return result
+
+    def invalidate(self) -> None:
+        """ Drops every memoized result and resets the statistics. """
+        self.results.clear()
+
+    def info(self) -> dict[str, int]:
+        return self.results.info()
+
+    def __getitem__(self, name: str) -> set_function:
+        if name not in self._functions:
+            raise KeyError(name)
+        if name not in self.pure:
+            return self._functions[name]
+        return lambda args: self.call(name, args)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._functions)
+
+    def __len__(self) -> int:
+        return len(self._functions)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Worker processes start with an empty cache; memoized results and the cache lock are not shipped
+        return {"functions": self._functions, "pure": tuple(self.pure), "max_elements": self.max_elements}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["functions"], state["pure"], state["max_elements"])
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, fields, replace
+from typing import Iterator, Mapping, MutableMapping
+
+from conjuntos.parser.exceptions import EvaluateError
+from conjuntos.model.bitset import as_universe, encode_relative
+from conjuntos.model.cardinality import intersection_size, operation_size
+from conjuntos.model.evaluator import OPCODES, dispatch, dispatch_chain, evaluate, is_set, set_element_t, set_function
+from conjuntos.model.instrumentation import instrumentation
+from conjuntos.model.intervals import IntervalSet
+from conjuntos.model.numeric import NUMERIC_THRESHOLD, NumericSet
+from conjuntos.model.views import materialize, size
+from conjuntos.model.wrapper import FrozenSetWrapper, Number
+from conjuntos.parser.workspace import Workspace
+
+
+_DIFFERENCE: int = OPCODES["DIFFERENCE"]
+_COUNTED_OPERATIONS: frozenset[str] = frozenset(("UNION", "INTERSECT", "DIFFERENCE", "SYMMETRIC_DIFFERENCE"))
+
+
+class Node(ABC):
+    """ Represents a node of a compiled expression tree. """
+    @abstractmethod
+    def evaluate(self, variables: MutableMapping[str, set_element_t], functions: Mapping[str, set_function]) -> set_element_t: ...
+
+    def children(self) -> tuple[Node, ...]:
+        """ Direct sub-expressions of this node. """
+        found: list[Node] = []
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, Node):
+                found.append(value)
+            elif isinstance(value, tuple):
+                found.extend(v for v in value if isinstance(v, Node))
+        return tuple(found)
+
+    def names(self) -> frozenset[str]:
+        """ Variable names read when evaluating this node. """
+        return frozenset().union(*(child.names() for child in self.children()))
+
+    def substitute(self, name: str, node: Node) -> Node:
+        """ Copy of this node where every read of the variable name is replaced by node. """
+        if name not in self.names():
+            return self
+        changes: dict = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, Node):
+                changes[f.name] = value.substitute(name, node)
+            elif isinstance(value, tuple) and any(isinstance(v, Node) for v in value):
+                changes[f.name] = tuple(v.substitute(name, node) if isinstance(v, Node) else v for v in value)
+        return replace(self, **changes)
+
+
+@dataclass(frozen=True)
+class Literal(Node):
+    """ Constant operand, such as a number. """
+    value: set_element_t
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        return self.value
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+
+@dataclass(frozen=True)
+class Var(Node):
+    """ Variable lookup; undefined names evaluate to their own text. """
+    name: str
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        if self.name in variables:
+            return variables[self.name]
+        return self.name
+
+    def names(self) -> frozenset[str]:
+        return frozenset((self.name,))
+
+    def substitute(self, name: str, node: Node) -> Node:
+        return node if name == self.name else self
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@dataclass(frozen=True)
+class SetLiteral(Node):
+    """ Set built from its elements, such as {1, A, {2}}. """
+    elements: tuple[Node, ...] = ()
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        values: list[set_element_t] = [materialize(element.evaluate(variables, functions)) for element in self.elements]
+        if len(values) >= NUMERIC_THRESHOLD:
+            numeric: NumericSet | None = NumericSet.of(values)
+            if numeric is not None:
+                return numeric
+        return FrozenSetWrapper.from_normalized(values)
+
+    def __str__(self) -> str:
+        return '{' + ", ".join(str(e) for e in self.elements) + '}'
+
+
+@dataclass(frozen=True)
+class BulkSetLiteral(Node):
+    """ Flat literal of numbers and names, such as {1, 2, A}, read as a single token.
+    The numbers are built into a set once, at compile time; only the names are looked up on evaluation. """
+    source: str
+    numbers: set_element_t = field(compare=False, repr=False)
+    variables: tuple[str, ...] = ()
+
+    @classmethod
+    def of(cls, items: tuple[str, ...]) -> BulkSetLiteral:
+        values: list[float] = []
+        variables: list[str] = []
+        for item in items:
+            if item[0] in "0123456789.":
+                values.append(float(item))
+            else:
+                variables.append(item)
+        numbers: set_element_t | None = NumericSet.from_values(values) if len(values) >= NUMERIC_THRESHOLD else None
+        if numbers is None:
+            numbers = FrozenSetWrapper.from_normalized(map(Number.of, values))
+        return cls('{' + ", ".join(items) + '}', numbers, tuple(variables))
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        if not self.variables:
+            return self.numbers
+        named: list[set_element_t] = [materialize(Var(name).evaluate(variables, functions)) for name in self.variables]
+        if isinstance(self.numbers, NumericSet):
+            extra: NumericSet | None = NumericSet.of(named)
+            if extra is not None:
+                return evaluate("UNION", self.numbers, extra)
+        return FrozenSetWrapper.from_normalized([*self.numbers, *named])
+
+    def names(self) -> frozenset[str]:
+        return frozenset(self.variables)
+
+    def substitute(self, name: str, node: Node) -> Node:
+        if name not in self.variables:
+            return self
+        elements: tuple[Node, ...] = tuple(Literal(number) for number in self.numbers)
+        return SetLiteral(elements + tuple(node if v == name else Var(v) for v in self.variables))
+
+    def __str__(self) -> str:
+        return self.source
+
+
+@dataclass(frozen=True)
+class RangeLiteral(Node):
+    """ Lazy set of the integers from start to stop (inclusive), such as {1..N}. """
+    start: Node
+    stop: Node
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        start: set_element_t = self.start.evaluate(variables, functions)
+        stop: set_element_t = self.stop.evaluate(variables, functions)
+        interval: IntervalSet | None = IntervalSet.between(start, stop)
+        if interval is None:
+            raise EvaluateError(f"Range bounds must be integers. Instead got: {start}..{stop}")
+        return interval
+
+    def __str__(self) -> str:
+        return f"{{{self.start}..{self.stop}}}"
+
+
+@dataclass(frozen=True)
+class TupleLiteral(Node):
+    """ Ordered pair (or n-tuple), such as (1, A); the elements of cartesian products. """
+    elements: tuple[Node, ...]
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        return tuple(materialize(element.evaluate(variables, functions)) for element in self.elements)
+
+    def __str__(self) -> str:
+        return '(' + ", ".join(str(e) for e in self.elements) + ')'
+
+
+@dataclass(frozen=True)
+class Call(Node):
+    """ Call of a registered function, such as P(A). """
+    name: str
+    args: tuple[Node, ...] = ()
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        if self.name not in functions:
+            raise EvaluateError(f"Undefined function: '{self.name}'.")
+        args: list[set_element_t] = [arg.evaluate(variables, functions) for arg in self.args]
+        if instrumentation.enabled:
+            return instrumentation.timed(instrumentation.functions, self.name, lambda: functions[self.name](args), args)
+        return functions[self.name](args)
+
+    def __str__(self) -> str:
+        return f"{self.name}(" + ", ".join(str(a) for a in self.args) + ')'
+
+
+@dataclass(frozen=True)
+class Unary(Node):
+    """ Postfix unary operation, such as the complement A'. """
+    op: str
+    operand: Node
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        target: set_element_t = self.operand.evaluate(variables, functions)
+        if self.op == "COMPLEMENT":
+            if not is_set(target): raise EvaluateError("Complement expects a Set.")
+            if "S" not in variables: raise EvaluateError("Universal Set ('S') must be defined for complement.")
+            return dispatch(_DIFFERENCE, variables["S"], target)
+        raise EvaluateError(f"Invalid Operation: {self.op} {target}")
+
+    def names(self) -> frozenset[str]:
+        if self.op == "COMPLEMENT":
+            return self.operand.names() | {"S"}
+        return self.operand.names()
+
+    def __str__(self) -> str:
+        return f"{self.operand}'"
+
+
+@dataclass(frozen=True)
+class Binary(Node):
+    """ Binary operation between two operands. """
+    op: str
+    left: Node
+    right: Node
+    code: int = field(init=False, repr=False, compare=False)  # Opcode of op, resolved once
+
+    def __post_init__(self):
+        object.__setattr__(self, "code", OPCODES[self.op])
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        left: set_element_t = self.left.evaluate(variables, functions)
+        right: set_element_t = self.right.evaluate(variables, functions)
+        return dispatch(self.code, left, right)
+
+    def __str__(self) -> str:
+        return f"({self.left} {self.op} {self.right})"
+
+
+@dataclass(frozen=True)
+class Chain(Node):
+    """ Chain of one associative operator, such as A ∩ B ∩ C, evaluated as a single n-ary operation. """
+    op: str
+    operands: tuple[Node, ...]
+    code: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "code", OPCODES[self.op])
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        return dispatch_chain(self.code, [operand.evaluate(variables, functions) for operand in self.operands])
+
+    def __str__(self) -> str:
+        return "(" + f" {self.op} ".join(str(o) for o in self.operands) + ")"
+
+
+@dataclass(frozen=True)
+class Cardinality(Node):
+    """ Number of elements of a set, such as |A ∪ B|.
+    Set operations and complements are counted by inclusion–exclusion, and products and power sets stay lazy,
+    so the counted set itself is never built. A chain such as |A ∪ B ∪ C| combines every operand but the largest,
+    smallest first, and counts the result against the largest one. """
+    operand: Node
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        return Number.of(self.count(self.operand, variables, functions))
+
+    @staticmethod
+    def count(node: Node, variables: MutableMapping[str, set_element_t], functions: Mapping[str, set_function]) -> int:
+        if isinstance(node, Binary) and node.op in _COUNTED_OPERATIONS:
+            left: set_element_t = node.left.evaluate(variables, functions)
+            right: set_element_t = node.right.evaluate(variables, functions)
+            if is_set(left) and is_set(right):
+                return operation_size(node.op, left, right)
+            value: set_element_t = dispatch(node.code, left, right)
+        elif isinstance(node, Chain) and node.op in _COUNTED_OPERATIONS:
+            operands: list[set_element_t] = [operand.evaluate(variables, functions) for operand in node.operands]
+            if all(is_set(operand) for operand in operands):
+                *rest, largest = sorted(operands, key=size)
+                return operation_size(node.op, rest[0] if len(rest) == 1 else dispatch_chain(node.code, rest), largest)
+            value = dispatch_chain(node.code, operands)
+        elif isinstance(node, Unary) and node.op == "COMPLEMENT" and "S" in variables:
+            target: set_element_t = node.operand.evaluate(variables, functions)
+            if not is_set(target): raise EvaluateError("Complement expects a Set.")
+            universe: set_element_t = variables["S"]
+            if is_set(universe):
+                return size(universe) - intersection_size(universe, target)
+            value = dispatch(_DIFFERENCE, universe, target)
+        else:
+            value = node.evaluate(variables, functions)
+        if not is_set(value):
+            raise EvaluateError(f"Cardinality expects a Set. Instead got: '{value}'.")
+        return size(value)
+
+    def __str__(self) -> str:
+        return f"|{self.operand}|"
+
+
+@dataclass(frozen=True)
+class Define(Node):
+    """ Assignment of a value to a variable; evaluates to the assigned value.
+    Defining S indexes a new universe; sets inside S are then stored as bitmasks over it. """
+    name: str
+    value: Node
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        if isinstance(variables, Workspace):
+            return variables.define(self, functions)
+        value: set_element_t = self.compute(variables, functions)
+        variables[self.name] = value
+        return value
+
+    def redefine(self, previous: set_element_t) -> Define:
+        """ This definition with the reads of its own name replaced by previous, the value the name held before;
+        A = A ∪ {4} then defines A from what A was, rather than from itself. """
+        return Define(self.name, self.value.substitute(self.name, Literal(previous)))
+
+    def compute(self, variables, functions) -> set_element_t:
+        """ Value to be stored under name, without storing it. """
+        value: set_element_t = self.value.evaluate(variables, functions)
+        if self.name == "S":
+            return as_universe(value)
+        return encode_relative(value, variables.get("S"))
+
+    def __str__(self) -> str:
+        return f"{self.name} = {self.value}"
+
+
+@dataclass(frozen=True)
+class Guarded(Node):
+    """ Rewritten form of original; body is used only when every node in sets evaluates to a set
+    and every node in empties to an empty set, otherwise original is evaluated instead. """
+    body: Node
+    original: Node
+    sets: tuple[Node, ...] = ()
+    empties: tuple[Node, ...] = ()
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        for check in self.sets:
+            if not is_set(check.evaluate(variables, functions)):
+                return self.original.evaluate(variables, functions)
+        for check in self.empties:
+            value: set_element_t = check.evaluate(variables, functions)
+            if not is_set(value) or size(value) != 0:
+                return self.original.evaluate(variables, functions)
+        return self.body.evaluate(variables, functions)
+
+    def __str__(self) -> str:
+        return str(self.body)
+
+
+class _SharedScope(MutableMapping[str, set_element_t]):
+    """ Variables plus hidden names bound to shared sub-expressions; each one is evaluated once, on first read. """
+    def __init__(self, variables: MutableMapping[str, set_element_t], pending: dict[str, Node], functions: Mapping[str, set_function]):
+        self.variables: MutableMapping[str, set_element_t] = variables
+        self.pending: dict[str, Node] = pending
+        self.values: dict[str, set_element_t] = {}
+        self.functions: Mapping[str, set_function] = functions
+
+    def __getitem__(self, name: str) -> set_element_t:
+        if name in self.values:
+            return self.values[name]
+        if name in self.pending:
+            value: set_element_t = self.pending[name].evaluate(self, self.functions)
+            self.values[name] = value
+            return value
+        return self.variables[name]
+
+    def __setitem__(self, name: str, value: set_element_t) -> None:
+        self.variables[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        del self.variables[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.pending or name in self.variables
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.variables)
+
+    def __len__(self) -> int:
+        return len(self.variables)
+
+
+@dataclass(frozen=True)
+class Let(Node):
+    """ Common sub-expressions of body; shared[i] is read through Var(hidden[i]) and evaluated at most once.
+    Never holds a Define (see optimizer._share): definitions must reach the variable table itself, such as a Workspace,
+    and not the scope of the hidden names. """
+    hidden: tuple[str, ...]
+    shared: tuple[Node, ...]
+    body: Node
+
+    def evaluate(self, variables, functions) -> set_element_t:
+        scope: _SharedScope = _SharedScope(variables, dict(zip(self.hidden, self.shared)), functions)
+        return self.body.evaluate(scope, functions)
+
+    def names(self) -> frozenset[str]:
+        return super().names() - frozenset(self.hidden)
+
+    def __str__(self) -> str:
+        return str(self.body)
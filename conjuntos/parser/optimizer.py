@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import fields, replace
+from typing import Callable, Optional
+
+from conjuntos.model.evaluator import CHAINABLE
+from conjuntos.parser.nodes import Node, Literal, Var, SetLiteral, Unary, Binary, Chain, Define, Guarded, Let
+
+# A rule returns the rewritten node, or None if it does not apply
+_rule_t = Callable[[Node], Optional[Node]]
+
+_EMPTY: SetLiteral = SetLiteral()
+_UNIVERSE: Var = Var("S")
+
+
+def _is_empty(node: Node) -> bool:
+    """ Nodes expected to be ∅; the guard of each rewrite checks it at evaluation. """
+    return node == _EMPTY or node == Var("∅")
+
+
+def _is_complement(node: Node) -> bool:
+    return isinstance(node, Unary) and node.op == "COMPLEMENT"
+
+
+def _binary(node: Node, *ops: str) -> bool:
+    return isinstance(node, Binary) and node.op in ops
+
+
+# Rules
+def _idempotence(n: Node) -> Optional[Node]:
+    """ A ∪ A = A ∩ A = A """
+    if _binary(n, "UNION", "INTERSECT") and n.left == n.right:
+        return Guarded(n.left, n, sets=(n.left,))
+    return None
+
+
+def _self_inverse(n: Node) -> Optional[Node]:
+    """ A - A = A ⊕ A = ∅ """
+    if _binary(n, "DIFFERENCE", "SYMMETRIC_DIFFERENCE") and n.left == n.right:
+        return Guarded(_EMPTY, n, sets=(n.left,))
+    return None
+
+
+def _identity(n: Node) -> Optional[Node]:
+    """ A ∪ ∅ = A ⊕ ∅ = A - ∅ = A """
+    if _binary(n, "UNION", "SYMMETRIC_DIFFERENCE", "DIFFERENCE") and _is_empty(n.right):
+        return Guarded(n.left, n, sets=(n.left,), empties=(n.right,))
+    if _binary(n, "UNION", "SYMMETRIC_DIFFERENCE") and _is_empty(n.left):
+        return Guarded(n.right, n, sets=(n.right,), empties=(n.left,))
+    return None
+
+
+def _annihilation(n: Node) -> Optional[Node]:
+    """ A ∩ ∅ = ∅ ∩ A = ∅ - A = ∅ """
+    if _binary(n, "INTERSECT") and _is_empty(n.right):
+        return Guarded(_EMPTY, n, sets=(n.left,), empties=(n.right,))
+    if _binary(n, "INTERSECT", "DIFFERENCE") and _is_empty(n.left):
+        return Guarded(_EMPTY, n, sets=(n.right,), empties=(n.left,))
+    return None
+
+
+def _absorption(n: Node) -> Optional[Node]:
+    """ A ∪ (A ∩ B) = A ∩ (A ∪ B) = A """
+    inner: dict[str, str] = {"UNION": "INTERSECT", "INTERSECT": "UNION"}
+    if not _binary(n, *inner):
+        return None
+    for a, other in ((n.left, n.right), (n.right, n.left)):
+        if _binary(other, inner[n.op]) and a in (other.left, other.right):
+            b: Node = other.right if other.left == a else other.left
+            return Guarded(a, n, sets=(a, b))
+    return None
+
+
+def _symmetric_difference(n: Node) -> Optional[Node]:
+    """ (A ∪ B) - (A ∩ B) = A ⊕ B """
+    if _binary(n, "DIFFERENCE") and _binary(n.left, "UNION") and _binary(n.right, "INTERSECT"):
+        union, intersection = n.left, n.right
+        if (union.left, union.right) in ((intersection.left, intersection.right), (intersection.right, intersection.left)):
+            return Binary("SYMMETRIC_DIFFERENCE", union.left, union.right)
+    return None
+
+
+def _de_morgan(n: Node) -> Optional[Node]:
+    """ A' ∩ B' = (A ∪ B)' and A' ∪ B' = (A ∩ B)' """
+    if _binary(n, "UNION", "INTERSECT") and _is_complement(n.left) and _is_complement(n.right):
+        dual: str = "INTERSECT" if n.op == "UNION" else "UNION"
+        return Unary("COMPLEMENT", Binary(dual, n.left.operand, n.right.operand))
+    return None
+
+
+def _double_complement(n: Node) -> Optional[Node]:
+    """ (A')' = S - (S - A) = A ∩ S """
+    if _is_complement(n) and _is_complement(n.operand):
+        a: Node = n.operand.operand
+        return Guarded(Binary("INTERSECT", a, _UNIVERSE), n, sets=(a, _UNIVERSE))
+    return None
+
+
+def _universe_difference(n: Node) -> Optional[Node]:
+    """ S - A' = A ∩ S """
+    if _binary(n, "DIFFERENCE") and n.left == _UNIVERSE and _is_complement(n.right):
+        a: Node = n.right.operand
+        return Guarded(Binary("INTERSECT", a, _UNIVERSE), n, sets=(a, _UNIVERSE))
+    return None
+
+
+_rules: dict[str, _rule_t] = {
+    "idempotence": _idempotence,
+    "self-inverse": _self_inverse,
+    "identity": _identity,
+    "annihilation": _annihilation,
+    "absorption": _absorption,
+    "symmetric-difference": _symmetric_difference,
+    "de-morgan": _de_morgan,
+    "double-complement": _double_complement,
+    "universe-difference": _universe_difference,
+}
+
+
+def _map_children(node: Node, f: Callable[[Node], Node]) -> Node:
+    """ Copy of node with f applied to each direct sub-expression. """
+    changes: dict = {}
+    for field in fields(node):
+        value = getattr(node, field.name)
+        if isinstance(value, Node):
+            changes[field.name] = f(value)
+        elif isinstance(value, tuple) and any(isinstance(v, Node) for v in value):
+            changes[field.name] = tuple(f(v) if isinstance(v, Node) else v for v in value)
+    return replace(node, **changes) if changes else node
+
+
+def _rewrite(node: Node, fired: list[str]) -> Node:
+    """ Bottom-up rewriting; each node is rewritten until no rule applies. """
+    if isinstance(node, Guarded):
+        return node
+    node = _map_children(node, lambda child: _rewrite(child, fired))
+    changed: bool = True
+    while changed and not isinstance(node, Guarded):
+        changed = False
+        for name, rule in _rules.items():
+            rewritten: Optional[Node] = rule(node)
+            if rewritten is not None:
+                fired.append(name)
+                node = _map_children(rewritten, lambda child: _rewrite(child, fired)) if not isinstance(rewritten, Guarded) else rewritten
+                changed = True
+                break
+    return node
+
+
+def _is_leaf(node: Node) -> bool:
+    return isinstance(node, (Literal, Var)) or node == _EMPTY
+
+
+def _share(node: Node, fired: list[str]) -> Node:
+    """ Binds every sub-expression that occurs more than once to a hidden name evaluated once. """
+    counts: Counter[Node] = Counter()
+
+    def count(n: Node) -> None:
+        counts[n] += 1
+        if counts[n] == 1:
+            for child in n.children():
+                count(child)
+
+    count(node)
+    if any(isinstance(n, Define) for n in counts):
+        # Assignments inside the expression must run where they are written, and against the real variable table:
+        # inside a Let they would be stored through its scope of hidden names, bypassing a reactive Workspace
+        return node
+
+    hidden: dict[Node, str] = {}
+    shared: list[Node] = []
+
+    def substitute(n: Node) -> Node:
+        if n in hidden:
+            return Var(hidden[n])
+        replaced: Node = _map_children(n, substitute)
+        if counts[n] > 1 and not _is_leaf(n):
+            hidden[n] = f"shared {len(shared)}"  # Not a valid token, so it never clashes with a variable
+            shared.append(replaced)
+            return Var(hidden[n])
+        return replaced
+
+    body: Node = substitute(node)
+    if not shared:
+        return node
+    fired.append("common-subexpression")
+    return Let(tuple(hidden[n] for n in hidden), tuple(shared), body)
+
+
+def optimize(node: Node) -> tuple[Node, tuple[str, ...]]:
+    """ Applies set-algebra identities and shares repeated sub-expressions.
+    Returns the new tree and the name of every rewrite that fired. """
+    fired: list[str] = []
+    if isinstance(node, Define):
+        value, rewrites = optimize(node.value)
+        return Define(node.name, value), rewrites
+    node = _share(_rewrite(node, fired), fired)
+    return node, tuple(fired)
+
+
+def flatten(node: Node) -> Node:
+    """ Turns nested binary operations of one chainable operator, such as (A ∩ B) ∩ C, into a single Chain. """
+    node = _map_children(node, flatten)
+    if not (isinstance(node, Binary) and node.op in CHAINABLE):
+        return node
+    operands: list[Node] = []
+    for side in (node.left, node.right):
+        if isinstance(side, Chain) and side.op == node.op:
+            operands.extend(side.operands)
+        elif isinstance(side, Binary) and side.op == node.op:
+            operands.extend((side.left, side.right))
+        else:
+            operands.append(side)
+    return Chain(node.op, tuple(operands)) if len(operands) > 2 else node
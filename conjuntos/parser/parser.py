@@ -1,26 +1,26 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from collections import deque
+from collections import ChainMap, Counter
 from dataclasses import dataclass
-from enum import Enum, auto
-from typing import TypeVar, Generic
-
-from conjuntos.parser.exceptions import ParseError, EvaluateError
-from conjuntos.parser.tokenizer import Tokenizer, Token
-from conjuntos.model.evaluator import evaluate, set_element_t, set_function, get_priority, _OPERATORS, _UNARY_OPERATORS
-from conjuntos.model.wrapper import SetWrapper, Number
+from threading import Lock
+from time import perf_counter
+from typing import TypeVar, Generic, Mapping, MutableMapping, Optional
+
+from conjuntos.parser.cache import LRUCache
+from conjuntos.parser.compiler import Plan, build_tree
+from conjuntos.parser.nodes import Node
+from conjuntos.parser.optimizer import flatten, optimize
+from conjuntos.parser.tokenizer import Tokenizer
+from conjuntos.parser.workspace import Workspace
+from conjuntos.model.budget import budget
+from conjuntos.model.evaluator import set_element_t, set_function
+from conjuntos.model.instrumentation import instrumentation
 
 # Type Alias
 _T = TypeVar("_T")
 
 
-class ParseState(Enum):
-    OPERAND = auto()
-    OPERATOR = auto()
-    END = auto()
-
-
 @dataclass(frozen=True)
 class ParseResult(Generic[_T]):
     kind: str = "NONE"
@@ -34,14 +34,60 @@ class Parser(ABC, Generic[_T]):
 
 
 class SetParser(Parser):
-    """ Parses and Evaluates Set Expressions. """
-    def __init__(self, tokenizer: Tokenizer, variables: dict[str, set_element_t] = None, functions: dict[str, set_function] = None):
+    """ Parses and Evaluates Set Expressions.
+    With reactive=True, definitions are kept in a Workspace and recomputed when the variables they read change.
+    With optimize=True, compiled expressions are simplified by set-algebra identities before evaluation.
+    One instance can serve many threads: tokenizing, compiling and evaluating keep their state in locals,
+    and each caller passes its own scope (see scope()) instead of defining into the shared variables. """
+    def __init__(self, tokenizer: Tokenizer, variables: dict[str, set_element_t] = None, functions: Mapping[str, set_function] = None,
+                 cache_size: int = 256, reactive: bool = False, optimize: bool = False):
         self.tokenizer: Tokenizer = tokenizer
         self.variables: dict[str, set_element_t] = {} if (variables is None) else variables
-        self.functions: dict[str, set_function] = {} if (functions is None) else functions
-
-    def parse(self, expression: str) -> ParseResult[_T]:
-        """ Reads the expression and returns its evaluation. """
+        if reactive:
+            self.variables = Workspace(self.variables)
+        self.functions: Mapping[str, set_function] = {} if (functions is None) else functions
+        self.plans: LRUCache[str, Plan] = LRUCache(cache_size)
+        self.optimize: bool = optimize
+        self.rewrites: Counter[str] = Counter()  # Rewrites fired across every compiled expression
+        self._rewrites_lock: Lock = Lock()
+
+    def compile(self, expression: str) -> Plan:
+        """ Returns the compiled plan of the expression; repeated expressions are served from the cache. """
+        text: str = expression.strip()
+        plan: Optional[Plan] = self.plans.get(text)
+        if plan is None:
+            if instrumentation.enabled:
+                root: Node = self._timed_build(text)
+            else:
+                root = build_tree(self.tokenizer.scan(text))
+            rewrites: tuple[str, ...] = ()
+            if self.optimize:
+                start: float = perf_counter()
+                root, rewrites = optimize(root)
+                with self._rewrites_lock:
+                    self.rewrites.update(rewrites)
+                if instrumentation.enabled:
+                    instrumentation.record_phase("optimize", perf_counter() - start)
+            plan = Plan(expression=text, root=flatten(root), functions=self.functions, rewrites=rewrites)
+            self.plans.put(text, plan)
+        return plan
+
+    def _timed_build(self, text: str) -> Node:
+        """ Tokenizes up front, instead of streaming, so the two phases are timed separately. """
+        start: float = perf_counter()
+        tokens = self.tokenizer.tokenize(text)
+        tokenized: float = perf_counter()
+        root: Node = build_tree(tokens)
+        instrumentation.record_phase("tokenize", tokenized - start)
+        instrumentation.record_phase("parse", perf_counter() - tokenized)
+        return root
+
+    def scope(self) -> ChainMap:
+        """ Copy-on-write view of the variables: definitions stay in the returned scope, reads fall through. """
+        return ChainMap({}, self.variables)
+
+    def command(self, expression: str) -> Optional[ParseResult[_T]]:
+        """ The result of a calculator command (exit, clean, stats, save, load or an empty line); None for expressions. """
         formatted: str = expression.strip().lower()
 
         if formatted in ("sair", "quit", "exit"):
@@ -50,153 +96,33 @@ class SetParser(Parser):
             return ParseResult(kind="CLEAN", value=0)
         if formatted == '':
             return ParseResult(kind="NONE", value=0)
-
-        state: ParseState = ParseState.OPERAND
-        tokens: list[Token] = self.tokenizer.tokenize(expression)
-
-        stack: deque[Token] = deque()
-        operands: deque[set_element_t] = deque()
-
-        for t in tokens:
-            if state == ParseState.OPERAND:
-                if t.kind == "NUMBER":
-                    operands.append(Number(t.value))
-                    state = ParseState.OPERATOR
-                elif t.kind == "VAR":
-                    stack.append(t)
-                    state = ParseState.OPERATOR
-                elif t.kind == "OPEN":
-                    stack.append(t)
-                elif t.kind == "SET_OPEN":
-                    stack.append(t)
-                    stack.append(Token(kind="SEP", text=','))
-                elif t.kind == "SET_CLOSE":
-                    stack.pop()  # sep
-                    should_open: Token = stack.pop()  # open
-                    if should_open.kind != "SET_OPEN": raise ParseError(f"Error at '{should_open.text}' missing element.")
-                    operands.append(SetWrapper())
-                    state = ParseState.OPERATOR
-                else:
-                    raise ParseError(f"Unexpected Token: '{t.text}'")
-
-            elif state == ParseState.OPERATOR:
-                if t.kind in _OPERATORS:
-                    while stack:
-                        temp: Token = stack.pop()
-                        stack.append(temp)  # stack.top()
-
-                        if (temp.kind == "OPEN") or (get_priority(temp.kind) < get_priority(t.kind)):
-                            break
-
-                        if temp.kind == "VAR":
-                            if t.kind == "DEFINE":
-                                break
-                            else:
-                                var: Token = stack.pop()
-                                if var.text not in self.variables:
-                                    operands.append(var.text)
-                                else:
-                                    operands.append(self.variables[var.text])
-                                    if t.kind != "END":
-                                        break
-
-                        elif temp.kind == "DEFINE":
-                            stack.pop()  # define
-                            var: Token = stack.pop()
-                            if var.kind != "VAR":
-                                raise ParseError(f"Expected Variable Name. Instead got: '{var.text}'")
-                            value: set_element_t = operands.pop()
-                            self.variables[var.text] = value
-
-                        elif temp.kind in _UNARY_OPERATORS:
-                            unary_op: Token = stack.pop()
-                            unary_target: set_element_t = operands.pop()
-                            if unary_op.kind == "COMPLEMENT":
-                                if type(unary_target) != SetWrapper: raise ParseError("Complement expects a Set.")
-                                if "S" not in self.variables: raise ParseError("Universal Set ('S') must be defined for complement.")
-                                operands.append(evaluate("DIFFERENCE", self.variables["S"], unary_target))
-
-                        elif temp.kind in _OPERATORS:
-                            op: Token = stack.pop()
-                            right: set_element_t = operands.pop()
-                            left: set_element_t = operands.pop()
-                            operands.append(evaluate(op.kind, left, right))
-
-                    stack.append(t)
-                    if t.kind in _UNARY_OPERATORS: continue  # Unary is treated like an operand; skips to Another Operator
-                    state = ParseState.OPERAND
-                    if t.kind == "END":
-                        break
-
-                elif t.kind in ("SEP", "OPEN"):
-                    stack.append(t)
-                    state = ParseState.OPERAND
-
-                elif t.kind == "CLOSE":
-                    args_count: int = 0
-                    while stack:
-                        arg_token: Token = stack.pop()
-                        if arg_token.kind == "OPEN":
-                            if stack:
-                                should_var: Token = stack.pop()
-                                if should_var.kind == "VAR":
-                                    args: list[set_element_t] = []
-                                    if args_count == 0 and operands:
-                                        args.append(operands.pop())
-                                    else:
-                                        for _ in range(args_count): args.append(operands.pop())
-                                    operands.append(self.functions[should_var.text](args[::-1]))
-                                elif should_var.kind in _OPERATORS:
-                                    stack.append(should_var)
-                                    break
-                                elif should_var.kind == "SEP":
-                                    pass
-                                else:
-                                    raise ParseError(f"Expected Function. Instead got '{should_var.text}'.")
-                            else:
-                                break
-
-                        if arg_token.kind == "VAR":
-                            args_count += 1
-                            if arg_token.text not in self.variables:
-                                operands.append(arg_token.text)
-                            else:
-                                operands.append(self.variables[arg_token.text])
-
-                        elif arg_token.kind in _UNARY_OPERATORS:
-                            unary_target: set_element_t = operands.pop()
-                            if arg_token.kind == "COMPLEMENT":
-                                if type(unary_target) != SetWrapper: raise ParseError("Complement expects a Set.")
-                                if "S" not in self.variables: raise ParseError("Universal Set ('S') must be defined for complement.")
-                                operands.append(evaluate("DIFFERENCE", self.variables["S"], unary_target))
-
-                        elif arg_token.kind in _OPERATORS:
-                            right: set_element_t = operands.pop()
-                            left: set_element_t = operands.pop()
-                            result: set_element_t = evaluate(arg_token.kind, left, right)
-                            operands.append(result)
-                            args_count += 1
-
-                elif t.kind == "SET_CLOSE":
-                    group_set: SetWrapper[set_element_t] = SetWrapper()
-                    while stack:
-                        set_token: Token = stack.pop()
-                        if set_token.kind == "SET_OPEN":
-                            break
-                        elif set_token.kind == "VAR":
-                            if set_token.text not in self.variables:
-                                operands.append(set_token.text)
-                            else:
-                                operands.append(self.variables[set_token.text])
-                        elif set_token.kind == "SEP":
-                            group_set.add(operands.pop())
-                    operands.append(group_set)
-                else:
-                    raise ParseError(f"Undefined behavior for: '{t.text}'")
-
-        should_end: Token = stack.pop()
-        assert should_end.kind == "END", f"Expected END token. Instead got: '{should_end.text}'."
-
-        if operands:
-            return ParseResult(kind="VALUE", value=operands.pop())
-        return ParseResult(kind="NONE")
+        words: list[str] = formatted.split()
+        if words[0] in ("stats", "estatisticas") and words[1:] in ([], ["on"], ["off"], ["reset"]):
+            return ParseResult(kind="STATS", value=words[1] if len(words) > 1 else "")
+        if words[0] in ("save", "salvar") and len(words) == 2:
+            return ParseResult(kind="SAVE", value=expression.split()[1])
+        if words[0] in ("load", "carregar") and len(words) in (2, 3) and words[2:] in ([], ["lazy"]):
+            # Value: (path, lazy)
+            return ParseResult(kind="LOAD", value=(expression.split()[1], len(words) == 3))
+        return None
+
+    def parse(self, expression: str, variables: Optional[MutableMapping[str, set_element_t]] = None) -> ParseResult[_T]:
+        """ Reads the expression and returns its evaluation.
+        Variables default to the parser's own table; a caller may pass another scope, such as one per session. """
+        result: Optional[ParseResult[_T]] = self.command(expression)
+        if result is not None:
+            return result
+
+        scope: MutableMapping[str, set_element_t] = self.variables if variables is None else variables
+        plan: Plan = self.compile(expression)
+        if budget.enabled:
+            budget.start()
+        if instrumentation.enabled:
+            start: float = perf_counter()
+            value: Optional[set_element_t] = plan.evaluate(scope)
+            instrumentation.record_phase("evaluate", perf_counter() - start)
+        else:
+            value = plan.evaluate(scope)
+        if value is None:
+            return ParseResult(kind="NONE")
+        return ParseResult(kind="VALUE", value=value)
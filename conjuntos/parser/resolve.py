@@ -27,11 +27,12 @@ class ParseHandler(Generic[_T]):
 
         return decorator
 
-    def resolve(self, expr: str) -> None:
-        """ Maps a handler to the expression parse output. Calls the handler with the result. """
+    def resolve(self, expr: str) -> ParseResult[_T]:
+        """ Maps a handler to the expression parse output. Calls the handler with the result and returns it. """
         result: ParseResult[_T] = self.parser.parse(expr)
         if result.kind in self.handlers:
             self.handlers[result.kind](result)
         else:
             if "DEFAULT" in self.handlers:
                 self.handlers["DEFAULT"](result)
+        return result
@@ -1,14 +1,15 @@
+import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from collections import deque
+from typing import Iterator, Optional
 
+from conjuntos.model.evaluator import OPCODES
 
-def is_float(text: str) -> bool:
-    try:
-        float(text)
-        return True
-    except ValueError:
-        return False
+try:
+    re.compile("a*+")
+    _POSSESSIVE: str = "+"
+except re.error:  # Python < 3.11; elements cannot contain separators, so backtracking out of a literal stays linear
+    _POSSESSIVE = ""
 
 
 @dataclass(frozen=True)
@@ -16,76 +17,117 @@ class Token:
     kind: str = field(init=True, default="NONE")
     value: float = field(init=True, default=0)
     text: str = field(init=True, default="")
+    start: int = field(init=True, default=0)
+    end: int = field(init=True, default=0)
+    opcode: int = field(init=True, default=-1)  # Operator tokens only
+    items: tuple[str, ...] = field(init=True, default=())  # Element texts of a SET_LITERAL
 
 
 class Tokenizer(ABC):
     """ Represents a Tokenizer; converts a string expression to a list of Tokens."""
-    def __init__(self):
-        self.stream: deque[str] = deque()
-
     # Methods
     def tokenize(self, expression: str) -> list[Token]:
-        tokens: list[Token] = []
-        self.stream = deque(expression.strip())
-
-        while self.stream:
-            t: Token = self.get()
-            tokens.append(t)
-
-        tokens.append(Token(kind="END"))
-
-        return tokens
+        return list(self.scan(expression))
 
     @abstractmethod
-    def get(self) -> Token: ...
+    def scan(self, expression: str) -> Iterator[Token]:
+        """ Lazily yields the tokens of the expression, ending with an END token. """
+        ...
 
 
 class SetTokenizer(Tokenizer):
-    """ Represents a Tokenizer able to read set characters as tokens. """
+    """ Represents a Tokenizer able to read set characters as tokens.
+    A flat literal of numbers and names, such as {1, 2, A}, is read in bulk as a single SET_LITERAL token. """
+    _number: str = r"\d+(?:\.\d+)?|\.\d+"  # '1..5' is 1, '..', 5 rather than '1.' and '.5'
 
     def __init__(self, token_kind: dict[str, str]):
         super().__init__()
         self.token_kind: dict[str, str] = token_kind
-
-    def next_char(self) -> str:
-        char: str = " "
-        while char.isspace():
-            char = self.stream.popleft()
-        return char
-
-    def find_match(self, word: str) -> str:
-        """ Future implementation; Aho-Corasick Algorithm. """
-        return word
-
-    def get(self) -> Token:
-        char: str = self.next_char()
-
-        if char in self.token_kind:
-            return Token(kind=self.token_kind[char], text=char)
-
-        self.stream.appendleft(char)
-        num_str: str = ""
-        while self.stream:
-            char = self.stream.popleft()
-            if char.isdigit() or char == '.':
-                num_str += char
-            else:
-                self.stream.appendleft(char)
-                break
-
-        if is_float(num_str):
-            return Token(kind="NUMBER", value=float(num_str))
-
-        var_str: str = ""
-        while self.stream:
-            char = self.stream.popleft()
-            if char.isspace():
-                break
-            if char in self.token_kind:
-                self.stream.appendleft(char)
-                break
-            var_str += char
-            if var_str in self.token_kind:
-                return Token(kind=self.token_kind[var_str], text=var_str)
-
-        return Token(kind="VAR", text=var_str)
+        self.opcodes: dict[str, int] = {s: OPCODES.get(kind, -1) for s, kind in token_kind.items()}
+        self.pattern: re.Pattern = self.compile_pattern(token_kind)
+        self.literal: Optional[re.Pattern] = self.compile_literal(token_kind)
+        self.opening: str = "".join(s[0] for s, kind in token_kind.items() if kind == "SET_OPEN")
+        self.separators: list[str] = [s for s, kind in token_kind.items() if kind == "SEP"]
+        self.keyword: Optional[re.Pattern] = self.compile_keyword(token_kind)
+
+    @staticmethod
+    def _name(token_kind: dict[str, str]) -> str:
+        """ Names stop at single-character symbols and at punctuation symbols such as '..', so 'a..b' reads as a range. """
+        singles: str = "".join(re.escape(s) for s in token_kind if len(s) == 1)
+        punctuation: str = "|".join(re.escape(s) for s in token_kind if len(s) > 1 and not re.search(r"\w", s))
+        name_char: str = "[^\\s" + singles + "]"
+        return f"(?:(?!{punctuation}){name_char})+" if punctuation else name_char + "+"
+
+    @classmethod
+    def compile_pattern(cls, token_kind: dict[str, str]) -> re.Pattern:
+        """ Builds the master pattern; longer symbols are tried first so 'INTERSECTION' wins over 'INTERSECT'. """
+        symbols: list[str] = sorted(token_kind, key=len, reverse=True)
+        return re.compile(
+            r"(?P<SPACE>\s+)"
+            r"|(?P<SYMBOL>" + ("|".join(re.escape(s) for s in symbols) or "(?!)") + ")"
+            r"|(?P<NUMBER>" + cls._number + ")"
+            r"|(?P<VAR>" + cls._name(token_kind) + ")"
+        )
+
+    @classmethod
+    def compile_literal(cls, token_kind: dict[str, str]) -> Optional[re.Pattern]:
+        """ Pattern of a flat set literal of numbers and names, such as {1, 2, A}.
+        None without set symbols, or when a separator could also appear inside a name. """
+        def alternatives(kind: str) -> str:
+            return "|".join(re.escape(s) for s, k in token_kind.items() if k == kind)
+        opening, closing, separator = alternatives("SET_OPEN"), alternatives("SET_CLOSE"), alternatives("SEP")
+        if not (opening and closing and separator):
+            return None
+        if any(len(s) > 1 and re.search(r"\w", s) for s, kind in token_kind.items() if kind == "SEP"):
+            return None
+        element: str = f"(?:{cls._number}|(?![\\d.]){cls._name(token_kind)})"  # Names never start like numbers
+        # Possessive repetition, where supported: a literal that turns out not to be flat fails without backtracking
+        return re.compile(f"(?:{opening})\\s*(?P<body>{element}(?:\\s*(?:{separator})\\s*{element})*{_POSSESSIVE})"
+                          f"\\s*(?:{closing})")
+
+    @staticmethod
+    def compile_keyword(token_kind: dict[str, str]) -> Optional[re.Pattern]:
+        """ Pattern of the word symbols, such as 'UNION' or 'e', that the scanner reads at the start of a name. """
+        words: list[str] = sorted((s for s in token_kind if re.search(r"\w", s)), key=len, reverse=True)
+        return re.compile("|".join(re.escape(s) for s in words)) if words else None
+
+    def _literal(self, expression: str, pos: int) -> Optional[Token]:
+        """ The whole flat literal starting at pos as a single token, or None to read it symbol by symbol. """
+        m = self.literal.match(expression, pos)
+        if m is None:
+            return None
+        body: str = m.group("body")
+        for separator in self.separators:
+            body = body.replace(separator, " ")  # Separators never occur inside elements
+        items: tuple[str, ...] = tuple(body.split())
+        if self.keyword is not None and any(self.keyword.match(item) for item in items):
+            return None  # Read symbol by symbol, like 'e' (∈) or the 'UNION' that starts 'UNIONA'
+        return Token(kind="SET_LITERAL", text=m.group(), start=pos, end=m.end(), items=items)
+
+    def scan(self, expression: str) -> Iterator[Token]:
+        match = self.pattern.match
+        token_kind: dict[str, str] = self.token_kind
+        opcodes: dict[str, int] = self.opcodes
+        pos: int = 0
+        length: int = len(expression)
+
+        while pos < length:
+            if self.literal is not None and expression[pos] in self.opening:
+                literal: Optional[Token] = self._literal(expression, pos)
+                if literal is not None:
+                    yield literal
+                    pos = literal.end
+                    continue
+            m = match(expression, pos)
+            group: str = m.lastgroup
+            text: str = m.group()
+            end: int = m.end()
+            if group == "SYMBOL":
+                yield Token(kind=token_kind[text], text=text, start=pos, end=end, opcode=opcodes[text])
+            elif group == "NUMBER":
+                yield Token(kind="NUMBER", value=float(text), text=text, start=pos, end=end)
+            elif group == "VAR":
+                yield Token(kind="VAR", text=text, start=pos, end=end)
+            pos = end
+
+        yield Token(kind="END", start=length, end=length, opcode=OPCODES["END"])
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterator, Mapping, MutableMapping, Optional
+
+from conjuntos.parser.exceptions import EvaluateError
+from conjuntos.model.evaluator import set_element_t, set_function
+
+if TYPE_CHECKING:
+    from conjuntos.parser.nodes import Define
+
+
+class Workspace(MutableMapping[str, set_element_t]):
+    """ Reactive variable table; definitions remember their expression and are recomputed lazily when a dependency changes.
+    A mutable mapping of values is kept as the table itself, so a lazily loaded snapshot is still decoded on first use. """
+    def __init__(self, values: Optional[Mapping[str, set_element_t]] = None):
+        self._values: MutableMapping[str, set_element_t] = values if isinstance(values, MutableMapping) else dict(values or {})
+        self._definitions: dict[str, tuple[Define, Mapping[str, set_function]]] = {}
+        self._dependencies: dict[str, frozenset[str]] = {}
+        self._dependents: dict[str, set[str]] = {}
+        self._dirty: set[str] = set()
+        self.recomputed: int = 0
+
+    # Mapping
+    def __getitem__(self, name: str) -> set_element_t:
+        if name in self._dirty:
+            self._recompute(name)
+        return self._values[name]
+
+    def __setitem__(self, name: str, value: set_element_t) -> None:
+        """ Plain assignment; drops any recorded definition of name. """
+        self._forget(name)
+        self._values[name] = value
+        self._invalidate(name)
+
+    def __delitem__(self, name: str) -> None:
+        self._forget(name)
+        del self._values[name]
+        self._invalidate(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    # Definitions
+    def define(self, definition: Define, functions: Mapping[str, set_function]) -> set_element_t:
+        """ Records the definition and its dependencies, evaluates it and marks its dependents dirty.
+        A redefinition that reads its own name, such as A = A ∪ {4}, is resolved against the previous value of the name,
+        as in a plain variable table; the new definition still follows the other names it reads. """
+        name: str = definition.name
+        if name in definition.value.names():
+            if name not in self._values:  # Nothing to build on: evaluated once, as a plain variable would be
+                self[name] = definition.compute(self, functions)
+                return self._values[name]
+            definition = definition.redefine(self[name])
+        dependencies: frozenset[str] = definition.value.names()
+        if name in dependencies or name in self._upstream(dependencies):
+            raise EvaluateError(f"Circular definition of '{name}'.")
+
+        self._forget(name)
+        self._definitions[name] = (definition, functions)
+        self._dependencies[name] = dependencies
+        for dependency in dependencies:
+            self._dependents.setdefault(dependency, set()).add(name)
+
+        self._values[name] = definition.compute(self, functions)
+        self._invalidate(name)
+        return self._values[name]
+
+    def dependents(self, name: str) -> frozenset[str]:
+        """ Names whose definitions read name directly. """
+        return frozenset(self._dependents.get(name, ()))
+
+    def is_dirty(self, name: str) -> bool:
+        return name in self._dirty
+
+    def _recompute(self, name: str) -> None:
+        definition, functions = self._definitions[name]
+        # Dependencies are pulled (and recomputed first) through __getitem__
+        self._values[name] = definition.compute(self, functions)
+        self._dirty.discard(name)
+        self.recomputed += 1
+
+    def _invalidate(self, name: str) -> None:
+        """ Marks every transitive dependent of name dirty. """
+        pending: list[str] = list(self._dependents.get(name, ()))
+        while pending:
+            dependent: str = pending.pop()
+            if dependent not in self._dirty:
+                self._dirty.add(dependent)
+                pending.extend(self._dependents.get(dependent, ()))
+
+    def _forget(self, name: str) -> None:
+        """ Removes the recorded definition of name, keeping the edges of its dependents. """
+        self._definitions.pop(name, None)
+        self._dirty.discard(name)
+        for dependency in self._dependencies.pop(name, ()):
+            self._dependents.get(dependency, set()).discard(name)
+
+    def _upstream(self, names: frozenset[str]) -> set[str]:
+        """ Every name the given names depend on, transitively. """
+        seen: set[str] = set()
+        pending: list[str] = list(names)
+        while pending:
+            name: str = pending.pop()
+            for dependency in self._dependencies.get(name, ()):
+                if dependency not in seen:
+                    seen.add(dependency)
+                    pending.append(dependency)
+        return seen
@@ -0,0 +1,261 @@
+""" Asyncio server for the set calculator.
+
+Protocol: one expression (or command) per line; every request gets exactly one response line:
+    OK              statement without a value, such as a definition
+    OK <value>      value of the expression
+    ERR <message>   parse, evaluation or server error
+    BYE             after 'exit'; the server then closes the connection
+Each connection has its own variables, layered over a shared read-only base (S, ∅, PI).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import os
+from collections import ChainMap
+from concurrent.futures import BrokenExecutor
+from multiprocessing.pool import Pool
+from typing import Any, Callable, Mapping, MutableMapping, Optional
+
+from conjuntos.main import base_variables, kind_to_symbols, reverse_symbols
+from conjuntos.model.budget import budget
+from conjuntos.model.evaluator import is_set, power_set, set_element_t
+from conjuntos.model.snapshot import load
+from conjuntos.model.views import SetView, size
+from conjuntos.parser.compiler import Plan
+from conjuntos.parser.exceptions import ParseError, EvaluateError
+from conjuntos.parser.functions import FunctionRegistry
+from conjuntos.parser.nodes import Node, Var, Literal, SetLiteral, BulkSetLiteral, RangeLiteral, TupleLiteral, Call, Binary
+from conjuntos.parser.parser import SetParser, ParseResult
+from conjuntos.parser.tokenizer import SetTokenizer
+
+
+# Costs are capped here; anything this large is heavy whatever the threshold
+_MAX_COST: int = 1 << 64
+
+
+def cost(node: Node, scope: Mapping[str, set_element_t]) -> int:
+    """ Rough size of the work behind node: the cardinalities it reads, their product for X, and 2^n for P. """
+    if isinstance(node, Var):
+        value: Optional[set_element_t] = scope.get(node.name)
+        return size(value) if is_set(value) else 1
+    if isinstance(node, BulkSetLiteral):
+        return size(node.numbers) + len(node.variables)
+    if isinstance(node, RangeLiteral):
+        if isinstance(node.start, Literal) and isinstance(node.stop, Literal):
+            return max(0, int(node.stop.value.value) - int(node.start.value.value) + 1)
+        return _MAX_COST  # Bounds only known when evaluated
+    costs: list[int] = [cost(child, scope) for child in node.children()]
+    if isinstance(node, Binary) and node.op == "CARTESIAN":
+        return min(math.prod(costs), _MAX_COST)
+    inner: int = sum(costs)
+    if isinstance(node, (SetLiteral, TupleLiteral)):
+        return inner + len(node.elements)
+    if isinstance(node, Call) and node.name == "P":
+        return 1 << min(inner, 64)
+    return inner
+
+
+def heavy_view(value: Optional[set_element_t], threshold: int) -> bool:
+    """ Whether value is a lazy view whose formatting (which materializes it) is heavy work. """
+    return isinstance(value, SetView) and value._materialized is None and size(value) >= threshold
+
+
+def _evaluate_remote(plan: Plan, variables: dict[str, set_element_t]) -> tuple[Optional[str], dict[str, set_element_t]]:
+    """ Runs in a worker process: evaluates and formats the plan.
+    Returns the text of the value (None for definitions) and the variables it assigned. """
+    scope: dict[str, set_element_t] = dict(variables)
+    if budget.enabled:
+        budget.start()
+    value: Optional[set_element_t] = plan.evaluate(scope)
+    changes: dict[str, set_element_t] = {name: v for name, v in scope.items() if variables.get(name) is not v}
+    return (None if value is None else str(value)), changes
+
+
+def _format_remote(value: set_element_t) -> str:
+    """ Runs in a worker process: formats a lazy view computed inline. """
+    if budget.enabled:
+        budget.start()
+    return str(value)
+
+
+class Server:
+    """ Serves one SetParser (and its plan cache) to many connections, each with its own scope.
+    Evaluations whose cost reaches threshold, and lazy results at least that large, run in a process pool, at most
+    max_pending at a time; further heavy requests wait for a slot, which in turn stops reading from their connections.
+    A job still running after timeout seconds is answered with an error and the pool is replaced. Evaluations run inline
+    cannot be interrupted that way: they are bounded by the time budget, which main() sets to the same timeout. """
+    def __init__(self, parser: SetParser, workers: Optional[int] = None, threshold: int = 50_000, timeout: float = 30.0,
+                 max_pending: Optional[int] = None):
+        self.parser: SetParser = parser
+        self.threshold: int = threshold
+        self.timeout: float = timeout
+        self.workers: int = workers or os.cpu_count() or 1
+        self.pool: Pool = self._new_pool()
+        self.running: set[asyncio.Future] = set()  # Jobs of the current pool
+        self.slots: asyncio.Semaphore = asyncio.Semaphore(max_pending or self.workers * 2)
+        self.sessions: int = 0
+        self.requests: int = 0
+
+    async def execute(self, line: str, scope: ChainMap) -> tuple[str, bool]:
+        """ The response to one request line, and whether the connection should stay open. """
+        result: Optional[ParseResult] = self.parser.command(line)
+        if result is not None:
+            if result.kind == "EXIT":
+                return "BYE", False
+            if result.kind == "CLEAN":
+                scope.maps[0].clear()
+                return "OK", True
+            if result.kind == "NONE":
+                return "OK", True
+            return f"ERR '{line.strip()}' is not available on the server.", True
+
+        plan: Plan = self.parser.compile(line)
+        if cost(plan.root, scope) < self.threshold:
+            if budget.enabled:
+                budget.start()
+            value: Optional[set_element_t] = plan.evaluate(scope)
+            if heavy_view(value, self.threshold):
+                return f"OK {await self.offload(_format_remote, value)}", True
+            return ("OK" if value is None else f"OK {value}"), True
+
+        variables: dict[str, set_element_t] = {name: scope[name] for name in plan.root.names() if name in scope}
+        text, changes = await self.offload(_evaluate_remote, plan, variables)
+        scope.maps[0].update(changes)
+        return ("OK" if text is None else f"OK {text}"), True
+
+    async def offload(self, task: Callable[..., Any], *args: Any) -> Any:
+        """ Runs task(*args) in the pool once a slot is free; recycles the pool if it is not done within the timeout. """
+        async def run() -> Any:
+            async with self.slots:
+                return await self.submit(task, *args)
+
+        try:
+            return await asyncio.wait_for(run(), self.timeout)
+        except asyncio.TimeoutError:
+            self.recycle()
+            raise
+
+    def submit(self, task: Callable[..., Any], *args: Any) -> asyncio.Future:
+        """ Future of task(*args) in the current pool, completed from the pool's result thread. """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        running: set[asyncio.Future] = self.running
+        running.add(future)
+        future.add_done_callback(running.discard)
+
+        def settle(outcome: Any, failed: bool) -> None:
+            if future.done():  # Cancelled by a timeout, or failed by recycle()
+                return
+            if failed:
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+        self.pool.apply_async(task, args, callback=lambda r: loop.call_soon_threadsafe(settle, r, False),
+                              error_callback=lambda e: loop.call_soon_threadsafe(settle, e, True))
+        return future
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ One session: requests are answered in order, one at a time. """
+        self.sessions += 1
+        scope: ChainMap = self.parser.scope()  # Definitions shadow the shared base, never change it
+        try:
+            while True:
+                try:
+                    raw: bytes = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(b"ERR Line too long.\n")
+                    break
+                if not raw:
+                    break
+                line: str = raw.decode("utf-8", errors="replace")
+                self.requests += 1
+                try:
+                    response, keep = await self.execute(line, scope)
+                except (ParseError, EvaluateError) as e:
+                    response, keep = f"ERR {e}", True
+                except asyncio.TimeoutError:
+                    response, keep = f"ERR Timed out after {self.timeout}s.", True
+                except BrokenExecutor:
+                    response, keep = "ERR Worker stopped by another request's timeout; try again.", True
+                except Exception as e:
+                    response, keep = f"ERR {type(e).__name__}: {e}", True
+                writer.write(response.replace("\n", " ").encode("utf-8") + b"\n")
+                await writer.drain()  # Slow readers hold their session, not the server
+                if not keep:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    def _new_pool(self) -> Pool:
+        # Workers apply the same budget as the server process, also when they are spawned instead of forked
+        return Pool(self.workers, initializer=budget.configure,
+                    initargs=(budget.max_elements, budget.max_bytes, budget.max_seconds))
+
+    def recycle(self) -> None:
+        """ Replaces the pool, terminating its workers: a timed-out job would otherwise keep its worker busy.
+        Other jobs of the old pool fail and are answered with an error. """
+        old, running = self.pool, self.running
+        self.pool, self.running = self._new_pool(), set()
+        old.terminate()
+        for future in running:
+            if not future.done():
+                future.set_exception(BrokenExecutor("The worker was stopped."))
+
+    def close(self) -> None:
+        self.pool.terminate()
+        self.pool.join()
+
+
+async def serve(server: Server, host: str, port: int, unix: Optional[str], limit: int) -> None:
+    if unix:
+        listener = await asyncio.start_unix_server(server.handle, path=unix, limit=limit)
+    else:
+        listener = await asyncio.start_server(server.handle, host=host, port=port, limit=limit)
+    addresses: str = ", ".join(str(s.getsockname()) for s in listener.sockets)
+    print(f"Serving on {addresses} ({server.workers} workers, threshold {server.threshold}).", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Set Calculator server")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=7878)
+    arg_parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    arg_parser.add_argument("--workers", type=int, help="processes for heavy evaluations (default: number of CPUs)")
+    arg_parser.add_argument("--threshold", type=int, default=50_000,
+                            help="estimated size from which an evaluation runs in a worker process")
+    arg_parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a heavy request is answered with an error")
+    arg_parser.add_argument("--max-pending", type=int, help="heavy evaluations running or queued at once (default: 2 per worker)")
+    arg_parser.add_argument("--max-line", type=int, default=1 << 24, help="longest accepted request, in bytes")
+    arg_parser.add_argument("--load", metavar="SNAPSHOT", help="add the variables of SNAPSHOT to the shared base")
+    args = arg_parser.parse_args()
+
+    budget.configure(max_seconds=args.timeout)  # Also bounds the evaluations run inline
+    base: MutableMapping[str, set_element_t] = base_variables()
+    if args.load:
+        base.update(load(args.load))
+    parser: SetParser = SetParser(SetTokenizer(reverse_symbols(kind_to_symbols)), variables=base,
+                                  functions=FunctionRegistry({"P": power_set}, pure=("P",)))
+
+    async def run() -> None:
+        server: Server = Server(parser, args.workers, args.threshold, args.timeout, args.max_pending)
+        try:
+            await serve(server, args.host, args.port, args.unix, args.max_line)
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
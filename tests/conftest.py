@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import pytest
+
+from conjuntos.main import base_variables, kind_to_symbols, reverse_symbols
+from conjuntos.model.evaluator import power_set
+from conjuntos.parser.functions import FunctionRegistry
+from conjuntos.parser.parser import SetParser
+from conjuntos.parser.tokenizer import SetTokenizer
+
+
+def new_parser(**options) -> SetParser:
+    """ Parser configured as the calculator's, with the base variables S, ∅ and PI. """
+    return SetParser(SetTokenizer(reverse_symbols(kind_to_symbols)), variables=base_variables(),
+                     functions=FunctionRegistry({"P": power_set}, pure=("P",)), **options)
+
+
+@pytest.fixture
+def make_parser() -> Callable[..., SetParser]:
+    return new_parser
+
+
+@pytest.fixture
+def parser() -> SetParser:
+    return new_parser()
+
+
+@pytest.fixture
+def calc(parser: SetParser) -> Callable[[str], str]:
+    """ Evaluates one statement and returns its value as the calculator prints it. """
+    return lambda expression: str(parser.parse(expression).value)
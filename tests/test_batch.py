@@ -0,0 +1,34 @@
+import io
+
+from conjuntos.main import run_batch
+from conjuntos.parser.resolve import ParseHandler
+
+
+def run(parser, text: str) -> tuple[list[str], int, int]:
+    out = io.StringIO()
+    handler = ParseHandler(parser, default_handler=lambda r: print("Unexpected Result.", file=out))
+    handler.add("VALUE")(lambda r: print(r.value, file=out))
+    for kind in ("NONE", "EXIT"):
+        handler.add(kind)(lambda r: None)
+    statements, errors = run_batch(handler, io.StringIO(text), out)
+    return out.getvalue().splitlines(), statements, errors
+
+
+def test_statements_run_in_order(parser):
+    lines, statements, errors = run(parser, "A = {1, 2}\n\nA ∩ {2, 3}\n1 ∈ A\n")
+    assert lines == ["{2}", "True"]
+    assert (statements, errors) == (3, 0)
+
+
+def test_errors_are_reported_with_their_line_and_the_run_goes_on(parser):
+    lines, statements, errors = run(parser, "A = {1}\n(A ∪\nA ⊄ 3\nA\n")
+    assert lines[0].startswith("[ERROR] line 2:")
+    assert lines[1].startswith("[ERROR] line 3: TypeError")
+    assert lines[2] == "{1}"
+    assert (statements, errors) == (4, 2)
+
+
+def test_exit_stops_the_run(parser):
+    lines, statements, errors = run(parser, "{1}\nexit\n{2}\n")
+    assert lines == ["{1}"]
+    assert statements == 2
@@ -0,0 +1,33 @@
+from conjuntos.model.bitset import BitSet
+
+
+def test_subsets_of_s_are_bitmasks(parser, calc):
+    calc("S = {1, 2, 3, 4, 5, 6, 7, 8}")
+    calc("A = {1, 2, 3}")
+    a = parser.variables["A"]
+    assert isinstance(a, BitSet) and a.mask == 0b111
+
+
+def test_operations_stay_in_the_universe(parser, calc):
+    calc("S = {1, 2, 3, 4}")
+    calc("A = {1, 2}")
+    calc("B = {2, 3}")
+    assert isinstance(parser.parse("A ∪ B").value, BitSet)
+    assert calc("A ∩ B") == "{2}"
+    assert calc("A - B") == "{1}"
+    assert calc("A ⊖ B") in ("{1, 3}", "{3, 1}")
+    assert calc("A'") in ("{3, 4}", "{4, 3}")
+    assert calc("A ⊆ S") == "True"
+
+
+def test_sets_outside_the_universe_are_kept_as_is(parser, calc):
+    calc("S = {1, 2}")
+    calc("A = {1, 5}")
+    assert not isinstance(parser.variables["A"], BitSet)
+    assert calc("A ∩ S") == "{1}"
+
+
+def test_bitset_equals_plain_set(parser, calc):
+    calc("S = {1, 2, 3}")
+    calc("A = {1, 2}")
+    assert parser.variables["A"] == parser.parse("{1, 2} ∪ {5} - {5}").value
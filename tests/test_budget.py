@@ -0,0 +1,66 @@
+import io
+
+import pytest
+
+from conjuntos.main import memory_size
+from conjuntos.model.budget import budget, format_bytes
+from conjuntos.model.render import render
+from conjuntos.parser.exceptions import EvaluateError
+
+
+@pytest.fixture
+def limits():
+    yield budget
+    budget.configure()
+
+
+def test_element_limit_refuses_before_building(calc, limits):
+    limits.configure(max_elements=1000)
+    with pytest.raises(EvaluateError, match="would have 1024 elements"):
+        calc("P({1..10})")
+    with pytest.raises(EvaluateError, match="elements; the budget is 1000"):
+        calc("{1..600} X {1..2}")
+    assert calc("P({1..9})") != ""  # 512 subsets fit
+
+
+def test_memory_limit(calc, limits):
+    limits.configure(max_bytes=memory_size("1M"))
+    with pytest.raises(EvaluateError, match=r"would take about .* the budget is 1\.0 MiB"):
+        calc("P({1..20})")
+
+
+def test_counting_and_membership_need_no_budget(calc, limits):
+    limits.configure(max_elements=10)
+    assert calc("|P({1..100})|") == str(2 ** 100)
+    assert calc("{1} ∈ P({1..100})") == "True"
+    assert calc("(1, 2) ∈ {1..1000} X {1..1000}") == "True"
+
+
+def test_set_operations_are_estimated(calc, limits):
+    calc("A = {11, 12, 13, 14, 15, 16}")  # Outside S, so a hash set
+    limits.configure(max_elements=10)
+    with pytest.raises(EvaluateError, match="The result of UNION"):
+        calc("A ∪ {17, 18, 19, 20, 21}")
+    assert calc("|A ∩ {11, 12, 13, 14, 15, 16, 17}|") == "6"
+
+
+def test_time_limit(calc, limits):
+    limits.configure(max_seconds=0.01)
+    with pytest.raises(EvaluateError, match="time budget"):
+        calc("P({1..18}) ∩ P({1..17})")
+    limits.configure(max_seconds=10)
+    assert calc("{1} ∪ {2}") == "{1, 2}"
+
+
+def test_limited_printing(parser):
+    out = io.StringIO()
+    render(parser.parse("{1..1000000}").value, out, limit=3)
+    assert out.getvalue() == "{1, 2, 3, … (999997 more)}\n"
+    out = io.StringIO()
+    render(parser.parse("P({1..10})").value, out, limit=3)
+    assert out.getvalue().endswith(", … (1021 more)}\n")
+
+
+def test_sizes():
+    assert memory_size("512M") == 512 << 20
+    assert format_bytes(3 << 30) == "3.0 GiB"
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from conjuntos.parser.exceptions import EvaluateError
+from conjuntos.parser.nodes import Cardinality, Chain
+
+_OPERATORS: list[str] = ["∪", "∩", "⊖", "-"]
+_OPERANDS: list[str] = ["A", "B", "C", "{1..6}", "∅", "P({1, 2})", "{x, 2}", "{1, 2} X {3}"]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_counts_match_the_built_sets(parser, seed):
+    rng = random.Random(seed)
+    for name in ("A", "B", "C"):
+        parser.parse(name + " = {" + ", ".join(str(rng.randrange(9)) for _ in range(rng.randrange(6))) + "}")
+    for _ in range(200):
+        operator = rng.choice(_OPERATORS)
+        expression = f" {operator} ".join(rng.choice(_OPERANDS) for _ in range(rng.randrange(2, 6)))
+        built = parser.parse(expression).value
+        assert parser.parse(f"|{expression}|").value.value == len(built), expression
+
+
+def test_chains_are_counted_without_building_the_largest_operand(parser):
+    plan = parser.compile("|P({1..40}) ∪ {1} ∪ {2}|")
+    assert isinstance(plan.root, Cardinality) and isinstance(plan.root.operand, Chain)
+    assert plan.evaluate(parser.variables).value == 2 ** 40 + 2
+    assert parser.parse("|{1} ∩ P({1..40}) ∩ {∅, 1}|").value.value == 0
+    assert parser.parse("|{1..1000000000} ∩ {5..100000000} ∩ {7..10000000}|").value.value == 10000000 - 6
+
+
+def test_non_set_operands(parser):
+    assert str(parser.parse("|{1, 2} ∪ {3} ∪ {4}|").value) == "4"
+    with pytest.raises(EvaluateError):
+        parser.parse("|1 ∪ {2} ∪ {3}|")
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from conjuntos.parser.compiler import build_tree
+from conjuntos.parser.nodes import Binary, Chain
+
+_OPERATORS: list[str] = ["∪", "∩", "⊖", "-"]
+_OPERANDS: list[str] = ["A", "B", "C", "D", "E", "{1..6}", "{}", "P({1, 2})", "x", "1", "{x, 2}"]
+
+
+@pytest.fixture
+def variables(parser):
+    rng = random.Random(3)
+    for name in "ABCD":
+        parser.parse(name + " = {" + ", ".join(str(rng.randrange(9)) for _ in range(rng.randrange(7))) + "}")
+    parser.parse("E = {" + ", ".join(map(str, range(20, 40))) + "}")
+    return parser
+
+
+def test_chains_are_flattened(parser):
+    assert isinstance(parser.compile("A ∪ B ∪ C").root, Chain)
+    assert len(parser.compile("A ∩ (B ∩ C) ∩ D").root.operands) == 4
+    assert isinstance(parser.compile("A - B - C").root, Binary)  # Not associative
+    assert isinstance(parser.compile("A ∪ B ∩ C").root, Binary)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_chains_match_the_binary_operations(variables, seed):
+    parser = variables
+    rng = random.Random(seed)
+    for _ in range(300):
+        operator = rng.choice(_OPERATORS[:3]) if rng.random() < 0.8 else None
+        parts = [rng.choice(_OPERANDS) for _ in range(rng.randrange(3, 7))]
+        expression = parts[0]
+        for part in parts[1:]:
+            expression += f" {operator or rng.choice(_OPERATORS)} {part}"
+        if rng.random() < 0.3:
+            expression = f"({expression}) {operator or '∪'} ({rng.choice(_OPERANDS)} {operator or '∩'} {rng.choice(_OPERANDS)})"
+        binary = build_tree(parser.tokenizer.scan(expression)).evaluate(parser.variables, parser.functions)
+        assert parser.compile(expression).evaluate(parser.variables) == binary, expression
+
+
+def test_intersection_stops_at_an_empty_operand(parser):
+    assert str(parser.parse("{1..1000000} ∩ ∅ ∩ P({1..60})").value) == "∅"
+
+
+def test_chains_under_views(parser):
+    assert str(parser.parse("{1..10} ∩ {5..20} ∩ {8..30}").value) == "{8..10}"
+    assert parser.parse("|P({1, 2}) ∪ P({2, 3}) ∪ P({3})|").value.value == 6
@@ -0,0 +1,89 @@
+import itertools
+
+import pytest
+
+from conjuntos.model import evaluator
+from conjuntos.model.evaluator import OPCODES, dispatch, evaluate
+from conjuntos.model.intervals import IntervalSet
+from conjuntos.model.views import PowerSetView, materialize
+from conjuntos.model.wrapper import FrozenSetWrapper, Number, SetWrapper
+from conjuntos.parser.exceptions import EvaluateError
+
+_SETS: list[str] = ["UNION", "INTERSECT", "DIFFERENCE", "SYMMETRIC_DIFFERENCE"]
+_SUBSETS: list[str] = ["PROPER_SUBSET", "IMPROPER_SUBSET", "NOT_SUBSET"]
+_EXPECTED = {
+    "UNION": lambda l, r: l | r,
+    "INTERSECT": lambda l, r: l & r,
+    "DIFFERENCE": lambda l, r: l - r,
+    "SYMMETRIC_DIFFERENCE": lambda l, r: l ^ r,
+    "PROPER_SUBSET": lambda l, r: l < r,
+    "IMPROPER_SUBSET": lambda l, r: l <= r,
+    "NOT_SUBSET": lambda l, r: not l < r,
+}
+
+
+def numbers(*values: int) -> FrozenSetWrapper:
+    return FrozenSetWrapper(Number(v) for v in values)
+
+
+_OPERANDS = {
+    "frozen": numbers(1, 2, 3, 4),
+    "mutable": SetWrapper(numbers(3, 4, 5)),
+    "empty": numbers(),
+    "range": IntervalSet.between(Number(2), Number(6)),
+}
+
+
+@pytest.mark.parametrize("op", _SETS + _SUBSETS)
+@pytest.mark.parametrize("left, right", list(itertools.product(_OPERANDS, repeat=2)))
+def test_dispatch_matches_the_set_operators(op, left, right):
+    l, r = _OPERANDS[left], _OPERANDS[right]
+    result = dispatch(OPCODES[op], l, r)
+    expected = _EXPECTED[op](frozenset(materialize(l)), frozenset(materialize(r)))
+    if op in _SETS:
+        assert frozenset(materialize(result)) == expected
+    else:
+        assert result is expected
+
+
+def test_membership(calc):
+    assert calc("1 ∈ {1, 2}") == "True"
+    assert calc("3 ∉ {1, 2}") == "True"
+    assert calc("{1} ∈ P({1, 2})") == "True"
+    assert calc("2 ∈ {1..5}") == "True"
+
+
+def test_invalid_combinations_give_false(calc):
+    assert calc("1 ∪ {1}") == "False"
+    assert calc("{1} ∩ 2") == "False"
+    assert calc("1 ∈ 2") == "False"
+    assert calc("1 ⊆ 2") == "False"
+
+
+def test_each_combination_is_resolved_once(monkeypatch):
+    resolved = []
+    original = evaluator._resolve
+
+    def spy(*key):
+        resolved.append(key)
+        return original(*key)
+
+    monkeypatch.setattr(evaluator, "_handlers", {})
+    monkeypatch.setattr(evaluator, "_resolve", spy)
+    left, right = numbers(1, 2), numbers(2, 3)
+    for _ in range(3):
+        assert dispatch(OPCODES["UNION"], left, right) == numbers(1, 2, 3)
+    dispatch(OPCODES["UNION"], left, PowerSetView(left))
+    assert resolved == [(OPCODES["UNION"], FrozenSetWrapper, FrozenSetWrapper),
+                        (OPCODES["UNION"], FrozenSetWrapper, PowerSetView)]
+
+
+def test_string_entry_point():
+    assert evaluate("INTERSECT", numbers(1, 2), numbers(2, 3)) == numbers(2)
+    with pytest.raises(EvaluateError):
+        evaluate("NOT_AN_OPERATOR", numbers(1), numbers(2))
+
+
+def test_tokens_carry_their_opcode(parser):
+    tokens = list(parser.tokenizer.tokenize("A ∪ B ∩ C"))
+    assert [t.opcode for t in tokens if t.kind in OPCODES] == [OPCODES["UNION"], OPCODES["INTERSECT"], OPCODES["END"]]
@@ -0,0 +1,67 @@
+import pickle
+
+from conjuntos.model.evaluator import power_set
+from conjuntos.model.wrapper import FrozenSetWrapper
+from conjuntos.parser.functions import FunctionRegistry, structural_key
+
+
+def counting_registry(**options) -> tuple[FunctionRegistry, list]:
+    calls: list = []
+
+    def counted(args):
+        calls.append(args)
+        return power_set(args)
+
+    return FunctionRegistry({"P": counted}, pure=("P",), **options), calls
+
+
+def test_pure_calls_are_memoized(make_parser):
+    functions, calls = counting_registry()
+    parser = make_parser()
+    parser.functions = functions
+    first = parser.parse("P({1, 2})").value
+    assert parser.parse("P({2, 1})").value is first  # Equal arguments, same result
+    assert len(calls) == 1
+    parser.parse("P({1, 2, 3})")
+    assert len(calls) == 2
+    assert functions.info()["hits"] == 1
+
+
+def test_impure_calls_are_not_memoized():
+    functions = FunctionRegistry()
+    calls: list = []
+    functions.register("F", lambda args: calls.append(args) or len(calls))
+    assert functions["F"]([1]) == 1
+    assert functions["F"]([1]) == 2
+
+
+def test_equal_arguments_in_other_representations_share_a_key(parser):
+    assert structural_key(parser.parse("{1..3}").value) == structural_key(parser.parse("{1, 2, 3}").value)
+    assert structural_key(parser.parse("{1..100000}").value) == structural_key(parser.parse("{1..100000}").value)
+    assert structural_key(parser.parse("{1..100000}").value) != structural_key(parser.parse("{1..99999}").value)
+
+
+def test_cache_is_bounded_by_result_size():
+    functions, calls = counting_registry(max_elements=20)
+    for n in range(1, 5):  # Power sets of 2, 4, 8 and 16 elements
+        functions["P"]([FrozenSetWrapper(range(n))])
+    assert functions.results.total_weight <= 20
+    functions["P"]([FrozenSetWrapper(range(5))])  # 32 elements: never stored
+    assert functions.results.total_weight <= 20
+    functions["P"]([FrozenSetWrapper(range(5))])
+    assert len(calls) == 6
+
+
+def test_redefining_a_function_drops_its_results():
+    functions, calls = counting_registry()
+    functions["P"]([FrozenSetWrapper({1})])
+    functions.register("P", power_set, pure=True)
+    assert len(functions.results) == 0
+
+
+def test_registry_pickles_without_its_results():
+    functions = FunctionRegistry({"P": power_set}, pure=("P",), max_elements=100)
+    functions["P"]([FrozenSetWrapper({1})])
+    copy = pickle.loads(pickle.dumps(functions))
+    assert copy.pure == {"P"} and copy.max_elements == 100
+    assert len(copy.results) == 0
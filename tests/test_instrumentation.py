@@ -0,0 +1,38 @@
+import pytest
+
+from conjuntos.main import format_stats
+from conjuntos.model.instrumentation import instrumentation
+
+
+@pytest.fixture
+def profiled():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_by_default(calc):
+    instrumentation.reset()
+    calc("{1} ∪ {2}")
+    assert instrumentation.snapshot()["operators"] == {}
+
+
+def test_operators_functions_and_phases_are_counted(profiled, calc):
+    calc("{1, 2} ∪ {3}")
+    calc("P({1, 2})")
+    snapshot = profiled.snapshot()
+    union = snapshot["operators"]["UNION"]
+    assert union["calls"] == 1
+    assert (union["input_size"], union["output_size"]) == (3, 3)
+    assert snapshot["functions"]["P"]["output_size"] == 4
+    assert {"tokenize", "parse", "evaluate"} <= set(snapshot["phases"])
+
+
+def test_stats_table(profiled, calc):
+    calc("{1} ∩ {1}")
+    table = format_stats(profiled.snapshot())
+    assert "[operators]" in table and "INTERSECT" in table
+    profiled.reset()
+    assert format_stats(profiled.snapshot()) == "No statistics recorded."
@@ -0,0 +1,40 @@
+import gc
+
+import pytest
+
+from conjuntos.model.wrapper import FrozenSetWrapper, Number, interning
+
+
+@pytest.fixture
+def interned():
+    interning.enable()
+    yield interning
+    interning.disable()
+
+
+def test_equal_sets_are_shared(interned):
+    first = FrozenSetWrapper([1, 2])
+    assert FrozenSetWrapper([2, 1]) is first
+    assert FrozenSetWrapper.from_normalized([Number(1), Number(2)]) is first
+    assert FrozenSetWrapper([1, 3]) is not first
+
+
+def test_canonical_sets_are_released(interned):
+    value = FrozenSetWrapper([10, 20])
+    alive = len(interned)
+    del value
+    gc.collect()
+    assert len(interned) == alive - 1
+
+
+def test_results_match_without_interning(make_parser, interned):
+    expressions = ["P({1, 2, 3}) ∩ P({2, 3, 4})", "{{1}, {1}, {2, {1}}}", "|P({1..6}) ∪ P({2..7})|"]
+    shared = [str(make_parser().parse(e).value) for e in expressions]
+    interned.disable()
+    assert shared == [str(make_parser().parse(e).value) for e in expressions]
+
+
+def test_nested_subsets_share_one_object(parser, interned):
+    value = parser.parse("P({1, 2}) ∪ P({2, 3})").value
+    twos = [s for s in value if s == FrozenSetWrapper([2])]
+    assert len(twos) == 1 and twos[0] is FrozenSetWrapper([2])
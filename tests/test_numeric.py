@@ -0,0 +1,41 @@
+import pytest
+
+from conjuntos.model import numeric
+from conjuntos.model.numeric import NUMERIC_THRESHOLD, NumericSet
+from conjuntos.model.wrapper import FrozenSetWrapper, Number
+
+
+def big_literal(start: int, count: int = NUMERIC_THRESHOLD) -> str:
+    return "{" + ", ".join(str(i) for i in range(start, start + count)) + "}"
+
+
+def test_without_numpy_numeric_sets_stay_hash_sets(monkeypatch, parser):
+    monkeypatch.setattr(numeric, "numpy", None)
+    assert NumericSet.of([Number(1), Number(2)]) is None
+    assert isinstance(parser.parse(big_literal(0)).value, FrozenSetWrapper)
+
+
+def test_large_numeric_literals_are_sorted_arrays(parser):
+    pytest.importorskip("numpy")
+    value = parser.parse(big_literal(0)).value
+    assert isinstance(value, NumericSet)
+    assert Number(5) in value and Number(-1) not in value
+
+
+def test_operations_between_arrays_match_hash_sets(parser):
+    pytest.importorskip("numpy")
+    left, right = big_literal(0), big_literal(NUMERIC_THRESHOLD // 2)
+    for op in ("∪", "∩", "-", "⊖"):
+        value = parser.parse(f"{left} {op} {right}").value
+        assert isinstance(value, NumericSet)
+        expected = parser.parse(f"(({left} ∪ {{x}}) {op} ({right} ∪ {{x}})) - {{x}}").value  # x keeps them hash sets
+        assert value == expected
+    assert str(parser.parse(f"{left} ⊆ {left} ∪ {{99999}}").value) == "True"
+
+
+def test_values_that_do_not_fit_an_array_are_refused():
+    pytest.importorskip("numpy")
+    assert NumericSet.from_values([1 << 63, 1]) is None
+    # 2^53 + 1 and 2^53 would round to the same float64
+    assert NumericSet.from_values([(1 << 53) + 1, 1 << 53, 0.5]) is None
+    assert len(NumericSet.from_values([(1 << 53) + 1, 1 << 53])) == 2
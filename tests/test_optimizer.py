@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from conjuntos.main import format_rewrites
+from conjuntos.parser.nodes import Binary, Let, Var
+from conjuntos.parser.optimizer import optimize
+
+_LEAVES: list[str] = ["A", "B", "C", "∅", "S", "{1, 2}", "{}", "A'", "3"]
+_OPERATORS: list[str] = ["∪", "∩", "-", "⊖"]
+
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(_LEAVES)
+    left: str = random_expression(rng, depth - 1)
+    # Repeated operands make the identities and the sharing fire often
+    right: str = left if rng.random() < 0.3 else random_expression(rng, depth - 1)
+    expression: str = f"({left} {rng.choice(_OPERATORS)} {right})"
+    return expression + "'" if rng.random() < 0.1 else expression
+
+
+def outcome(parser, expression: str):
+    try:
+        return parser.parse(expression).value
+    except Exception as e:
+        return type(e)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_optimized_evaluation_matches_plain_evaluation(make_parser, seed):
+    rng = random.Random(seed)
+    plain, optimized = make_parser(), make_parser(optimize=True)
+    for _ in range(5):
+        for name in ("A", "B", "C"):
+            definition = name + " = {" + ", ".join(str(rng.randrange(10)) for _ in range(rng.randrange(4))) + "}"
+            plain.parse(definition)
+            optimized.parse(definition)
+        for _ in range(40):
+            expression = random_expression(rng, 3)
+            assert outcome(optimized, expression) == outcome(plain, expression), expression
+    assert optimized.rewrites
+
+
+def test_rewrites_are_recorded(make_parser):
+    parser = make_parser(optimize=True)
+    plan = parser.compile("(A ∪ B) - (A ∩ B)")
+    assert plan.rewrites == ("symmetric-difference",)
+    parser.compile("A ∪ ∅")
+    parser.compile("A ∪ ∅")  # Cached: counted once
+    assert parser.rewrites == {"symmetric-difference": 1, "identity": 1}
+
+
+def test_rewrites_are_listed_by_stats():
+    assert "No rewrites" in format_rewrites({})
+    assert "identity                 applied=2" in format_rewrites({"identity": 2, "de-morgan": 1})
+
+
+def test_rules_keep_non_sets_unchanged(make_parser):
+    parser = make_parser(optimize=True)
+    assert parser.parse("3 ∪ 3").value == make_parser().parse("3 ∪ 3").value
+
+
+def test_repeated_subexpressions_are_shared():
+    union = Binary("UNION", Var("A"), Var("B"))
+    root, rewrites = optimize(Binary("DIFFERENCE", union, Binary("INTERSECT", union, Var("C"))))
+    assert isinstance(root, Let)
+    assert "common-subexpression" in rewrites
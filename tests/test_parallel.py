@@ -0,0 +1,59 @@
+import pytest
+
+from conjuntos.model.parallel import ParallelBackend, parallel
+from conjuntos.model.views import CartesianProductView, PowerSetView
+from conjuntos.model.wrapper import FrozenSetWrapper
+
+
+@pytest.fixture
+def pool():
+    """ The shared backend with two workers, taking the pool for every large enough product and power set. """
+    parallel.enable(2)
+    saved = dict(parallel.thresholds), parallel.calibrated
+    parallel.thresholds, parallel.calibrated = {"product": 0, "power_set": 0}, True
+    yield parallel
+    parallel.thresholds, parallel.calibrated = saved
+    parallel.disable()
+
+
+def test_pool_builds_the_same_product(pool):
+    left, right = FrozenSetWrapper(range(100)), FrozenSetWrapper(range(100, 200))
+    pooled = CartesianProductView(left, right).materialize()
+    pool.disable()
+    assert pooled == CartesianProductView(left, right).materialize()
+    assert len(pooled) == 10_000
+
+
+def test_pool_builds_the_same_power_set(pool):
+    base = FrozenSetWrapper(range(13))
+    pooled = PowerSetView(base).materialize()
+    pool.disable()
+    assert pooled == PowerSetView(base).materialize()
+    assert len(pooled) == 1 << 13
+
+
+def test_small_operations_and_set_operators_stay_serial(pool, calc):
+    assert not pool.worth("product", 100)
+    assert calc("{1, 2} ∩ {2, 3}") == "{2}"
+    assert calc("{1} ⊆ {1, 2}") == "True"
+
+
+def test_calibration_sets_a_threshold_only_when_the_pool_is_faster():
+    backend = ParallelBackend()
+    backend.enable(2)
+    backend.calibrate()
+    for kind in ("product", "power_set"):
+        measured = backend.measurements[kind]
+        threshold = backend.thresholds[kind]
+        if measured["pool_per_item"] >= measured["serial_per_item"]:
+            assert threshold is None
+        else:
+            assert threshold is not None and threshold > 0
+    assert backend.calibrated
+
+
+def test_given_thresholds_skip_calibration():
+    backend = ParallelBackend(product_threshold=10 ** 9, power_set_threshold=10 ** 9)
+    backend.enable(2)
+    assert not backend.worth("product", 10 ** 6)
+    assert backend.measurements == {}
@@ -0,0 +1,52 @@
+from conjuntos.parser.cache import LRUCache
+
+
+def test_repeated_expression_is_compiled_once(parser):
+    first = parser.compile("A ∪ {1, 2}")
+    assert parser.compile("  A ∪ {1, 2}  ") is first
+    assert parser.plans.info()["misses"] == 1
+    assert parser.plans.info()["hits"] == 1
+
+
+def test_cached_plan_reads_current_variables(parser, calc):
+    calc("A = {1}")
+    assert calc("A ∪ {2}") == "{1, 2}"
+    calc("A = {3}")
+    assert calc("A ∪ {2}") == "{2, 3}"
+    assert parser.plans.info()["hits"] >= 1
+
+
+def test_cache_size_bounds_the_plans(make_parser):
+    parser = make_parser(cache_size=2)
+    for expression in ("{1}", "{2}", "{3}", "{1}"):
+        parser.compile(expression)
+    info = parser.plans.info()
+    assert info["size"] == 2
+    assert info["misses"] == 4
+    assert info["evictions"] == 2
+
+
+def test_cache_size_zero_disables_caching(make_parser):
+    parser = make_parser(cache_size=0)
+    assert parser.compile("{1}") is not parser.compile("{1}")
+    assert len(parser.plans) == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_weighted_cache_bounds_total_weight():
+    cache = LRUCache(10, weight=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxxxx")
+    cache.put("c", "xxx")
+    assert "a" not in cache and cache.total_weight == 9
+    cache.put("huge", "x" * 11)
+    assert "huge" not in cache
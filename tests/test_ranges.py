@@ -0,0 +1,42 @@
+import pytest
+
+from conjuntos.model.intervals import DifferenceView, IntervalSet
+from conjuntos.parser.exceptions import EvaluateError, ParseError
+
+
+def test_ranges_are_not_expanded(parser, calc):
+    value = parser.parse("{1..1000000000}").value
+    assert isinstance(value, IntervalSet)
+    assert calc("|{1..1000000000}|") == "1000000000"
+    assert calc("999999999 ∈ {1..1000000000}") == "True"
+    assert calc("0 ∈ {1..1000000000}") == "False"
+
+
+def test_operations_between_ranges_stay_ranges(parser, calc):
+    assert isinstance(parser.parse("{1..10} ∪ {5..20}").value, IntervalSet)
+    assert calc("{1..10} ∩ {5..20}") == "{5..10}"
+    assert calc("|{1..10} - {3..4}|") == "8"
+    assert calc("{1..3} ⊆ {0..5}") == "True"
+
+
+def test_bounds_from_variables(calc):
+    calc("N = 4")
+    assert calc("{1..N}") == "{1..4}"
+    assert calc("|{1..N} ∪ {x}|") == "5"
+    assert calc("{3..1}") == "∅"
+
+
+def test_complement_in_a_large_universe_stays_lazy(parser, calc):
+    calc("S = {1..1000000}")
+    calc("A = {1, 2, 3}")
+    value = parser.parse("A'").value
+    assert isinstance(value, DifferenceView)
+    assert calc("|A'|") == "999997"
+    assert calc("2 ∈ A'") == "False"
+
+
+def test_invalid_ranges(calc):
+    with pytest.raises(EvaluateError):
+        calc("{1..x}")
+    with pytest.raises(ParseError):
+        calc("1..3")
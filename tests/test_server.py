@@ -0,0 +1,80 @@
+import asyncio
+import time
+from concurrent.futures import BrokenExecutor
+
+import pytest
+
+from conjuntos.model.budget import budget
+from conjuntos.parser.exceptions import EvaluateError
+from conjuntos.server import Server, cost, heavy_view
+
+
+@pytest.fixture
+def server(make_parser):
+    server = Server(make_parser(), workers=1, threshold=1000, timeout=5.0)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def time_budget():
+    yield budget
+    budget.configure()
+
+
+def run(server, *lines):
+    """ Responses to the lines, sent in order over one session. """
+    async def session():
+        scope = server.parser.scope()
+        return [(await server.execute(line, scope))[0] for line in lines]
+    return asyncio.run(session())
+
+
+def test_cost(parser):
+    scope = parser.scope()
+    parser.parse("A = {1..100}", scope)
+    assert cost(parser.compile("A ∪ {1, 2}").root, scope) == 102
+    assert cost(parser.compile("A X A").root, scope) == 100 * 100
+    assert cost(parser.compile("A X A X A").root, scope) == 100 ** 3
+    assert cost(parser.compile("P({1..20})").root, scope) == 1 << 20
+    assert cost(parser.compile("P(A)").root, scope) == 1 << 64
+
+
+def test_light_requests_run_inline(server):
+    assert run(server, "A = {1, 2}", "A ∩ {2, 3}", "exit") == ["OK", "OK {2}", "BYE"]
+
+
+def test_heavy_requests_run_in_the_pool_and_keep_their_definitions(server):
+    responses = run(server, "B = {1..40} X {1..40}", "(1, 40) ∈ B", "|B|")
+    assert responses == ["OK", "OK True", "OK 1600"]
+
+
+def test_lazy_results_are_heavy(parser):
+    assert heavy_view(parser.parse("P({1..10})").value, 1000)
+    assert not heavy_view(parser.parse("P({1..5})").value, 1000)
+    assert not heavy_view(parser.parse("{1, 2}").value, 1)
+
+
+def test_timeout_recycles_the_pool(server):
+    server.threshold, server.timeout = 0, 0.5
+    old = server.pool
+    with pytest.raises(asyncio.TimeoutError):
+        run(server, "P({1..24})")
+    assert server.pool is not old
+    assert run(server, "{1} ∪ {2}") == ["OK {1, 2}"]
+
+
+def test_recycle_fails_the_other_jobs(server):
+    async def scenario():
+        job = server.submit(time.sleep, 10)
+        server.recycle()
+        with pytest.raises(BrokenExecutor):
+            await job
+    asyncio.run(scenario())
+
+
+def test_inline_evaluations_follow_the_time_budget(server, time_budget):
+    server.threshold = 1 << 70  # Everything inline
+    time_budget.configure(max_seconds=0.01)
+    with pytest.raises(EvaluateError, match="time budget"):
+        run(server, "P({1..18}) ∩ P({1..17})")
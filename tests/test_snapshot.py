@@ -0,0 +1,80 @@
+import sys
+
+import pytest
+
+from conjuntos.main import main
+from conjuntos.model.snapshot import LazyVariables, load, save
+from conjuntos.parser.exceptions import EvaluateError
+from conjuntos.parser.workspace import Workspace
+
+_DEFINITIONS: list[str] = [
+    "A = {1, 2, 3}",
+    "B = {A, {A}, 7}",
+    "R = {1..1000000}",
+    "D = R - {5}",
+    "Q = P(A)",
+    "Y = A X {9}",
+    "T = {1, 2} ⊆ A",
+]
+
+
+@pytest.fixture
+def snapshot(parser, tmp_path):
+    for definition in _DEFINITIONS:
+        parser.parse(definition)
+    path = str(tmp_path / "workspace.cjs")
+    save(parser.variables, path)
+    return parser, path
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_round_trip(snapshot, lazy):
+    parser, path = snapshot
+    variables = load(path, lazy=lazy)
+    assert sorted(variables) == sorted(parser.variables)
+    for name, value in parser.variables.items():
+        assert variables[name] == value, name
+
+
+def test_lazy_load_decodes_on_first_access(snapshot):
+    _, path = snapshot
+    variables = load(path, lazy=True)
+    assert isinstance(variables, LazyVariables)
+    assert variables.decoded() == 0
+    variables["A"]
+    assert variables.decoded() == 1
+
+
+def test_workspace_keeps_a_lazy_load_lazy(snapshot, make_parser):
+    _, path = snapshot
+    variables = load(path, lazy=True)
+    reactive = make_parser(reactive=True)
+    reactive.variables = Workspace(variables)
+    reactive.parse("C = A ∪ {4}")
+    assert variables.decoded() == 3  # A, S (read to encode C over the universe) and the new C
+    assert str(reactive.parse("C").value) == "{1, 2, 3, 4}"
+
+
+@pytest.mark.parametrize("content", [b"", b"CJS1", b"not a snapshot at all, just some text" * 4])
+def test_not_a_snapshot(tmp_path, content):
+    path = tmp_path / "bad.cjs"
+    path.write_bytes(content)
+    with pytest.raises(EvaluateError, match="not a workspace snapshot"):
+        load(str(path))
+
+
+def test_truncated_snapshot(snapshot, tmp_path):
+    _, path = snapshot
+    data = open(path, "rb").read()
+    truncated = tmp_path / "truncated.cjs"
+    truncated.write_bytes(data[:len(data) // 2] + data[-4:])  # Magic intact at both ends
+    with pytest.raises(EvaluateError):
+        dict(load(str(truncated)))
+
+
+def test_cli_reports_an_empty_snapshot(tmp_path, capsys, monkeypatch):
+    (tmp_path / "empty.cjs").write_bytes(b"")
+    monkeypatch.setattr(sys, "argv", ["conjuntos", "--load", str(tmp_path / "empty.cjs")])
+    with pytest.raises(SystemExit):
+        main()
+    assert "not a workspace snapshot" in capsys.readouterr().err
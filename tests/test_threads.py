@@ -0,0 +1,80 @@
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conjuntos.parser.cache import LRUCache
+from conjuntos.parser.functions import FunctionRegistry
+from conjuntos.model.evaluator import power_set
+
+_TEMPLATES: list[str] = [
+    "A ∪ B", "A ∩ B", "A - B", "A ⊖ B", "A ⊂ B", "A ⊆ S", "(A ∪ B) ∩ S", "A X {1, 2}", "P({1, 2, 3}) - P(A ∩ B)",
+    "{1..50} - A", "{x, 1, 2} ∪ A", "C = A ∪ {7}", "C ∩ B", "(A - B) ∪ (B - A)", "A'",
+]
+_THREADS: int = 8
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    """ Switches threads as often as possible to surface races. """
+    interval: float = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def workload(thread: int, iterations: int) -> list[str]:
+    """ Definitions of A and B private to the thread, then random expressions over them. """
+    rng = random.Random(thread)
+    lines: list[str] = []
+    for i in range(iterations):
+        if i % 50 == 0:
+            for name in ("A", "B"):
+                lines.append(name + " = {" + ", ".join(str(rng.randrange(10)) for _ in range(rng.randrange(1, 8))) + "}")
+        lines.append(rng.choice(_TEMPLATES))
+    return lines
+
+
+def test_shared_parser_gives_the_sequential_results(make_parser):
+    # Small caches, so that lookups, insertions and evictions interleave
+    shared = make_parser(cache_size=8)
+    shared.functions = FunctionRegistry({"P": power_set}, pure=("P",), max_elements=64)
+    workloads = [workload(t, 300) for t in range(_THREADS)]
+    expected = []
+    for lines in workloads:
+        private = make_parser(cache_size=0)
+        expected.append([str(private.parse(line).value) for line in lines])
+    base = dict(shared.variables)
+    start = threading.Barrier(_THREADS)
+
+    def run(lines: list[str]) -> list[str]:
+        scope = shared.scope()
+        start.wait()  # Release every thread at once
+        return [str(shared.parse(line, scope).value) for line in lines]
+
+    with ThreadPoolExecutor(max_workers=_THREADS) as pool:
+        results = list(pool.map(run, workloads))
+    assert results == expected
+    assert shared.variables == base
+    assert len(shared.plans) <= 8
+
+
+def test_lru_cache_under_contention():
+    cache: LRUCache[int, int] = LRUCache(16)
+    calls = 2000
+
+    def hammer(thread: int) -> None:
+        rng = random.Random(thread)
+        for _ in range(calls):
+            key = rng.randrange(64)
+            value = cache.get(key)
+            assert value is None or value == key * 2
+            if value is None:
+                cache.put(key, key * 2)
+
+    with ThreadPoolExecutor(max_workers=_THREADS) as pool:
+        list(pool.map(hammer, range(_THREADS)))
+    assert len(cache) == cache.total_weight == 16
+    assert cache.hits + cache.misses == _THREADS * calls
@@ -0,0 +1,81 @@
+import pytest
+
+from conjuntos.main import kind_to_symbols, reverse_symbols
+from conjuntos.parser.exceptions import ParseError
+from conjuntos.parser.tokenizer import SetTokenizer
+
+
+@pytest.fixture(scope="module")
+def tokenizer() -> SetTokenizer:
+    return SetTokenizer(reverse_symbols(kind_to_symbols))
+
+
+def kinds(tokenizer: SetTokenizer, expression: str) -> list[str]:
+    return [t.kind for t in tokenizer.tokenize(expression)]
+
+
+def test_operators_numbers_and_names(tokenizer):
+    tokens = tokenizer.tokenize("A ∪ 2.5 ∩ B'")
+    assert [t.kind for t in tokens] == ["VAR", "UNION", "NUMBER", "INTERSECT", "VAR", "COMPLEMENT", "END"]
+    assert tokens[2].value == 2.5
+    assert (tokens[4].start, tokens[4].end) == (10, 11)
+
+
+def test_longest_keyword_wins(tokenizer):
+    assert kinds(tokenizer, "A INTERSECTION B") == ["VAR", "INTERSECT", "VAR", "END"]
+    assert tokenizer.tokenize("A INTERSECTION B")[1].text == "INTERSECTION"
+
+
+def test_range_is_not_read_as_decimals(tokenizer):
+    assert kinds(tokenizer, "(1..5)") == ["OPEN", "NUMBER", "RANGE", "NUMBER", "CLOSE", "END"]
+    assert kinds(tokenizer, "(a..b)") == ["OPEN", "VAR", "RANGE", "VAR", "CLOSE", "END"]
+
+
+def test_scan_is_lazy(tokenizer):
+    tokens = tokenizer.scan("A ∪ B")
+    assert next(tokens).kind == "VAR"
+
+
+def test_unbalanced_expression_is_a_parse_error(parser):
+    with pytest.raises(ParseError):
+        parser.parse("(A ∪ B")
+
+
+def test_flat_literal_is_one_token(tokenizer):
+    tokens = tokenizer.tokenize("{1, 2.5, A} ∪ B")
+    assert tokens[0].kind == "SET_LITERAL"
+    assert tokens[0].items == ("1", "2.5", "A")
+    assert kinds(tokenizer, "{1, {2}}")[:2] == ["SET_OPEN", "NUMBER"]
+
+
+def test_literal_pattern_without_possessive_quantifiers(monkeypatch):
+    from conjuntos.parser import tokenizer as module
+    monkeypatch.setattr(module, "_POSSESSIVE", "")  # As on Python < 3.11
+    fallback = SetTokenizer(reverse_symbols(kind_to_symbols))
+    assert "*+" not in fallback.literal.pattern
+    assert fallback.tokenize("{1, 2, A}")[0].items == ("1", "2", "A")
+    assert kinds(fallback, "{1, 2, {3}}")[:2] == ["SET_OPEN", "NUMBER"]
+
+
+@pytest.mark.parametrize("literal", ["{UNIONA}", "{1, UNIONA}", "{e}", "{A, INTERSECTB, 2}"])
+def test_keywords_read_the_same_in_bulk_and_symbol_by_symbol(tokenizer, literal):
+    assert kinds(tokenizer, literal)[0] == "SET_OPEN"
+
+
+def test_bulk_and_symbol_by_symbol_literals_agree(make_parser):
+    bulk, plain = make_parser(), make_parser()
+    plain.tokenizer.literal = None  # Every literal read symbol by symbol
+    for parser in (bulk, plain):
+        parser.parse("A = {7}")
+    for literal in ["{1, 2, A}", "{A, 3}", "{2.5, B}"]:
+        assert bulk.parse(literal).value == plain.parse(literal).value
+    for literal in ["{UNIONA}", "{1, UNIONA}"]:  # UNION followed by A, in both paths
+        for parser in (bulk, plain):
+            with pytest.raises(ParseError):
+                parser.parse(literal)
+
+
+def test_bulk_literals_share_interned_numbers(parser):
+    from conjuntos.model.wrapper import Number
+    value = parser.parse("{" + ", ".join(str(i) for i in range(5)) + "}").value
+    assert all(n is Number.of(n.value) for n in value)
@@ -0,0 +1,53 @@
+from conjuntos.model.views import CartesianProductView, PowerSetView
+from conjuntos.model.wrapper import SetWrapper
+
+
+def test_power_set_is_lazy(parser):
+    value = parser.parse("P({1..40})").value
+    assert isinstance(value, PowerSetView)
+    assert value.cardinality() == 2 ** 40
+    assert value._materialized is None
+
+
+def test_power_set_membership_without_enumerating(calc):
+    assert calc("{1, 2} ∈ P({1..1000})") == "True"
+    assert calc("{0} ∈ P({1..1000})") == "False"
+    assert calc("∅ ∈ P({1..1000})") == "True"
+
+
+def test_power_set_elements(parser):
+    value = parser.parse("P({1, 2, 3})").value
+    subsets = {frozenset(int(n.value) for n in s) for s in value}
+    assert len(subsets) == 8
+    assert subsets == {frozenset(s) for s in ([], [1], [2], [3], [1, 2], [1, 3], [2, 3], [1, 2, 3])}
+
+
+def test_power_set_equals_materialized_set(parser):
+    view = parser.parse("P({1, 2})").value
+    assert view == view.materialize()
+    assert hash(view) == hash(view.materialize())
+    assert view == PowerSetView(SetWrapper(view.base))
+
+
+def test_product_is_lazy(parser):
+    value = parser.parse("{1..1000} X {1..1000}").value
+    assert isinstance(value, CartesianProductView)
+    assert value.cardinality() == 10 ** 6
+    assert value._materialized is None
+
+
+def test_product_membership(calc):
+    calc("A = {1..1000}")
+    assert calc("(1, 2) ∈ A X A") == "True"
+    assert calc("(0, 2) ∈ A X A") == "False"
+
+
+def test_product_elements(calc):
+    assert calc("{1, 2} X {3}") in ("{(1, 3), (2, 3)}", "{(2, 3), (1, 3)}")
+    assert calc("{1} X ∅") == "∅"
+
+
+def test_product_subset_and_equality(calc):
+    assert calc("{1} X {2} ⊆ {1, 2} X {2, 3}") == "True"
+    assert calc("{1, 2} X {3} ⊆ {1} X {3}") == "False"
+    assert calc("({1, 2} X {3}) ∩ ({2} X {3, 4})") == "{(2, 3)}"
@@ -0,0 +1,82 @@
+import pytest
+
+from conjuntos.parser.exceptions import EvaluateError
+from conjuntos.parser.workspace import Workspace
+
+
+@pytest.fixture
+def reactive(make_parser):
+    parser = make_parser(reactive=True)
+    return parser, lambda expression: str(parser.parse(expression).value)
+
+
+def test_definitions_follow_their_dependencies(reactive):
+    parser, calc = reactive
+    calc("A = {1, 2}")
+    calc("B = A ∪ {3}")
+    calc("C = B - {1}")
+    calc("A = {5}")
+    assert parser.variables.is_dirty("C")
+    assert calc("C") in ("{3, 5}", "{5, 3}")
+    assert not parser.variables.is_dirty("C")
+
+
+def test_recompute_is_lazy_and_once(reactive):
+    parser, calc = reactive
+    calc("A = {1}")
+    calc("B = A ∪ {2}")
+    calc("A = {3}")
+    calc("A = {4}")
+    recomputed = parser.variables.recomputed
+    calc("B")
+    calc("B")
+    assert parser.variables.recomputed == recomputed + 1
+
+
+def test_plain_assignment_drops_the_definition(reactive):
+    parser, calc = reactive
+    calc("A = {1}")
+    calc("B = A")
+    parser.variables["B"] = parser.parse("{7}").value
+    calc("A = {2}")
+    assert calc("B") == "{7}"
+    assert "B" not in parser.variables.dependents("A")
+
+
+def test_cycles_are_refused(reactive):
+    _, calc = reactive
+    calc("A = {1}")
+    calc("B = A ∪ {2}")
+    with pytest.raises(EvaluateError, match="Circular"):
+        calc("A = B")
+
+
+@pytest.mark.parametrize("statements", [
+    ["A = {1}", "A = A ∪ {4}", "A"],
+    ["A = {1}", "A = A ∪ {4}", "A = A - {1}", "A"],
+    ["B = {2}", "A = B", "A = A ∪ B ∪ {3}", "A"],
+    ["A = {1}", "A = {A, 2}", "A"],
+    ["S = {1, 2, 3}", "S = S ∪ {4}", "4 ∈ S"],
+])
+def test_redefinition_from_the_previous_value_matches_plain_mode(make_parser, statements):
+    plain, reactive = make_parser(), make_parser(reactive=True)
+    for statement in statements:
+        assert str(reactive.parse(statement).value) == str(plain.parse(statement).value)
+
+
+def test_redefinition_keeps_following_the_other_names(reactive):
+    _, calc = reactive
+    calc("A = {1}")
+    calc("B = {2}")
+    calc("A = A ∪ B")
+    calc("B = {3}")
+    assert calc("A") in ("{1, 3}", "{3, 1}")
+
+
+def test_optimized_definitions_reach_the_workspace(make_parser):
+    parser = make_parser(reactive=True, optimize=True)
+    parser.parse("A = {1}")
+    parser.parse("B = (A ∪ {2}) ∩ (A ∪ {2})")
+    parser.parse("A = {3}")
+    assert isinstance(parser.variables, Workspace)
+    assert str(parser.parse("B").value) in ("{2, 3}", "{3, 2}")
@@ -0,0 +1,36 @@
+from conjuntos.model.wrapper import FrozenSetWrapper, Number, SetWrapper
+
+
+def test_results_are_immutable_sets(parser):
+    assert isinstance(parser.parse("{1, 2} ∪ {3}").value, FrozenSetWrapper)
+    assert isinstance(parser.parse("{1, {2}}").value, FrozenSetWrapper)
+
+
+def test_sets_nest_and_compare_by_contents(calc):
+    assert calc("{{1, 2}} ∪ {{2, 1}}") == "{{1, 2}}"
+    assert calc("{1, 2} ∈ {{2, 1}, 3}") == "True"
+
+
+def test_frozen_and_mutable_wrappers_compare_equal():
+    assert FrozenSetWrapper([1, 2]) == SetWrapper([2, 1])
+    assert SetWrapper([1, 2]) == FrozenSetWrapper([1, 2])
+    assert FrozenSetWrapper([1]) != FrozenSetWrapper([2])
+    assert hash(FrozenSetWrapper([1, 2])) == hash(SetWrapper([1, 2]))
+
+
+def test_printing():
+    assert str(FrozenSetWrapper()) == "∅"
+    assert str(FrozenSetWrapper([2.5])) == "{2.5}"
+
+
+def test_numbers_are_interned():
+    assert Number.of(7.0) is Number.of(7.0)
+    assert Number.of(7.0) == Number(7)
+    assert hash(Number.of(7.0)) == hash(7)
+
+
+def test_from_normalized_adopts_the_elements():
+    one = Number.of(1.0)
+    value = FrozenSetWrapper.from_normalized([one])
+    assert next(iter(value)) is one
+    assert not hasattr(Number.of(1.0), "__dict__")